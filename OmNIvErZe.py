@@ -41,24 +41,33 @@ import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
 from dataclasses import dataclass, field, asdict
-from typing import List, Dict, Tuple, Optional, Set, Any
+from typing import List, Dict, Tuple, Optional, Any
 import random
-import time
-from scipy.stats import entropy
-from scipy.spatial.distance import pdist, squareform, cdist
-from scipy.special import softmax
 import networkx as nx
-import os
 from tinydb import TinyDB, Query
-from collections import Counter, deque
+from collections import Counter
 import json
+import re
 import uuid
 import hashlib
 import colorsys
 import copy # Added for deep copying presets
 import zipfile
-import matplotlib.pyplot as plt
+import zlib
 import io
+import operator
+# matplotlib.pyplot is imported inside the functions that draw with it (the GRN
+# renders), and scipy.stats inside the simulation loops, so app start and the
+# Curator's Console never pay for them.
+
+# --- Shared NumPy random generator ---
+# One module-level Generator (PCG64) instead of the legacy global RandomState:
+# cheaper per draw, and the simulation loops reseed it in place for fixed-seed runs.
+RNG = np.random.default_rng()
+
+def seed_rng(seed: int):
+    """Reseeds the shared generator in place, so every holder of RNG sees the new stream."""
+    RNG.bit_generator.state = np.random.PCG64(seed).state
 
 # =================================================================
 #
@@ -293,9 +302,11 @@ for name in ['Cryo', 'Hydro', 'Pyro', 'Geo', 'Aero', 'Bio-Steel', 'Neuro-Gel', '
     base_template = random.choice(list(CHEMICAL_BASES_REGISTRY.values()))
     new_base = copy.deepcopy(base_template)
     new_base['name'] = name
+    # Scalar bounds use builtin min/max: np.clip on a Python float pays array dispatch
+    # and hands back a numpy scalar that then leaks into genes and the JSON archive.
     new_base['mass_range'] = (
-        np.clip(base_template['mass_range'][0] * random.uniform(0.5, 1.5), 0.1, 4.0),
-        np.clip(base_template['mass_range'][1] * random.uniform(0.5, 1.5), 0.5, 5.0)
+        min(max(base_template['mass_range'][0] * random.uniform(0.5, 1.5), 0.1), 4.0),
+        min(max(base_template['mass_range'][1] * random.uniform(0.5, 1.5), 0.5), 5.0)
     )
     CHEMICAL_BASES_REGISTRY[name] = new_base
 
@@ -451,6 +462,15 @@ class Genotype:
             objective_weights=self.objective_weights.copy()
         )
         return new_genotype
+
+    def genome_digest(self) -> str:
+        """
+        Content hash of the genome (component and rule genes). Ids are only 24
+        random bits and rules can be toggled during development, so this, not
+        the id, keys the caches that are shared across sessions.
+        """
+        genome = json.dumps([self.component_genes, self.rule_genes], cls=GenotypeJSONEncoder, sort_keys=True)
+        return hashlib.blake2b(genome.encode('utf-8'), digest_size=16).hexdigest()
     
     def compute_complexity(self) -> float:
         """Kolmogorov complexity approximation"""
@@ -505,10 +525,13 @@ class ExhibitGrid:
     The environment simulation for a gallery.
     A 2D Cellular Automaton with resources and physics.
     """
-    def __init__(self, settings: Dict):
+    def __init__(self, settings: Dict, seed: Optional[int] = None):
         self.width = settings.get('grid_width', 100)
         self.height = settings.get('grid_height', 100)
         self.settings = settings
+        # A seeded grid draws its terrain from its own Generator, so the same seed
+        # always yields the same resource maps; unseeded grids use the shared RNG.
+        self.rng = RNG if seed is None else np.random.default_rng(seed)
         
         self.grid: List[List[GridCell]] = []
         self.resource_map: Dict[str, np.ndarray] = {}
@@ -519,61 +542,59 @@ class ExhibitGrid:
         self.grid = [[GridCell(x, y) for y in range(self.height)] for x in range(self.width)]
         
         # --- Generate Resource Maps using Perlin-like noise ---
-        def generate_noise_map(octaves=4, persistence=0.5, lacunarity=2.0):
-            noise = np.zeros((self.width, self.height))
-            freq = 1.0
-            amp = 1.0
-            for _ in range(octaves):
-                # Ensure width/height are integers for noise generation
-                int_width, int_height = int(self.width), int(self.height)
-                if int_width <= 0 or int_height <= 0:
-                    st.error("Grid width/height must be positive.")
-                    return np.zeros((self.width, self.height))
-                    
-                noise_slice = np.random.normal(0, 1, (int_width, int_height))
-                
-                # Resize if necessary (e.g., if freq > 1)
-                if noise_slice.shape != (self.width, self.height):
-                     # This part is tricky, simplified for now
-                     pass
-                
-                if noise.shape == noise_slice.shape:
-                    noise += amp * noise_slice
-                else:
-                    # Failsafe if shapes mismatch (shouldn't happen with simple freq)
-                    pass
-
-                freq *= lacunarity
-                amp *= persistence
+        def generate_noise_map(octaves=4, persistence=0.5, lacunarity=2.0, scale=1.0):
+            # Ensure width/height are integers for noise generation
+            int_width, int_height = int(self.width), int(self.height)
+            if int_width <= 0 or int_height <= 0:
+                st.error("Grid width/height must be positive.")
+                return np.zeros((self.width, self.height))
+
+            # All octaves are drawn as one (octaves, w, h) block and summed with their
+            # amplitude weights in a single contraction, instead of one temporary per octave.
+            # (lacunarity is kept for the signature; octaves share the grid resolution.)
+            amplitudes = persistence ** np.arange(octaves)
+            octave_slices = self.rng.standard_normal((octaves, int_width, int_height))
+            noise = np.tensordot(amplitudes, octave_slices, axes=1)
                 
-            # Normalize to 0-1
-            if np.max(noise) - np.min(noise) > 0:
-                noise = (noise - np.min(noise)) / (np.max(noise) - np.min(noise))
+            # Normalize to 0-scale in place: one min/max reduction each, no full-size temporaries
+            noise_min = noise.min()
+            noise_range = noise.max() - noise_min
+            if noise_range > 0:
+                noise -= noise_min
+                noise *= scale / noise_range
             else:
                 noise = np.zeros((self.width, self.height))
             return noise
 
         # --- Populate Resources based on Settings ---
-        self.resource_map['light'] = generate_noise_map() * self.settings.get('light_intensity', 1.0)
-        self.resource_map['minerals'] = generate_noise_map(octaves=6) * self.settings.get('mineral_richness', 1.0)
-        self.resource_map['water'] = generate_noise_map(octaves=2) * self.settings.get('water_abundance', 1.0)
+        self.resource_map['light'] = generate_noise_map(scale=self.settings.get('light_intensity', 1.0))
+        self.resource_map['minerals'] = generate_noise_map(octaves=6, scale=self.settings.get('mineral_richness', 1.0))
+        self.resource_map['water'] = generate_noise_map(octaves=2, scale=self.settings.get('water_abundance', 1.0))
         
         temp_gradient = np.linspace(
             self.settings.get('temp_pole', -20), 
             self.settings.get('temp_equator', 30), 
             self.height
         )
-        temp_map = np.tile(temp_gradient, (self.width, 1))
-        self.resource_map['temperature'] = temp_map + (generate_noise_map(octaves=2) - 0.5) * 10
+        # +/-5 degree noise around the pole-to-equator gradient. The (height,) gradient
+        # broadcasts across every column in place, rather than being tiled into a full map.
+        temperature = generate_noise_map(octaves=2, scale=10.0)
+        temperature += temp_gradient - 5.0
+        self.resource_map['temperature'] = temperature
         
         # --- Apply to grid cells ---
-        for x in range(self.width):
-            for y in range(self.height):
-                cell = self.grid[x][y]
-                cell.light = self.resource_map['light'][x, y]
-                cell.minerals = self.resource_map['minerals'][x, y]
-                cell.water = self.resource_map['water'][x, y]
-                cell.temperature = self.resource_map['temperature'][x, y]
+        # Convert each map to nested lists once: plain list indexing per cell avoids a
+        # dict lookup plus an ndarray scalar __getitem__ for every resource of every cell.
+        light = self.resource_map['light'].tolist()
+        minerals = self.resource_map['minerals'].tolist()
+        water = self.resource_map['water'].tolist()
+        temperature = self.resource_map['temperature'].tolist()
+        for x, column in enumerate(self.grid):
+            for y, cell in enumerate(column):
+                cell.light = light[x][y]
+                cell.minerals = minerals[x][y]
+                cell.water = water[x][y]
+                cell.temperature = temperature[x][y]
                 
     def get_cell(self, x, y) -> Optional[GridCell]:
         if 0 <= x < self.width and 0 <= y < self.height:
@@ -615,6 +636,14 @@ class OrganismCell:
     # --- Internal State for GRN ---
     state_vector: Dict[str, Any] = field(default_factory=dict)
 
+# --- GRN condition operators: one dict lookup per condition instead of an if/elif ladder ---
+CONDITION_OPERATORS = {
+    '>': operator.gt,
+    '<': operator.lt,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
 class Phenotype:
     """
     The 'body' of the organism. A collection of OrganismCells on the grid.
@@ -737,14 +766,14 @@ class Phenotype:
                 # Check if neighbor is part of this organism
                 if neighbor_pos in signal_snapshot:
                     for signal_name, signal_value in signal_snapshot[neighbor_pos].items():
-                        if signal_name not in incoming_signals_tally:
-                            incoming_signals_tally[signal_name] = []
-                        incoming_signals_tally[signal_name].append(signal_value)
+                        incoming_signals_tally.setdefault(signal_name, []).append(signal_value)
 
-            # Average the tallied signals and store in 'signals_in'
+            # Average the tallied signals and store in 'signals_in'.
+            # At most 8 values per signal: plain sum/len avoids an ndarray round-trip
+            # per cell per development step, which np.mean pays even for tiny lists.
             for signal_name, values in incoming_signals_tally.items():
                 if values:
-                    cell.state_vector['signals_in'][signal_name] = np.mean(values)
+                    cell.state_vector['signals_in'][signal_name] = sum(values) / len(values)
         # --- END OF SIGNAL DIFFUSION BLOCK ---
             
             actions_to_take = []
@@ -873,18 +902,12 @@ class Phenotype:
             # --- END OF ADDITION ---
             
             
-            op = cond['operator']
-            target = cond['target_value']
+            compare = CONDITION_OPERATORS.get(cond['operator'])
+            if compare is None:
+                continue # Unknown operators never block a rule
             
             try:
-                if op == '>':
-                    if not (value > target): return False
-                elif op == '<':
-                    if not (value < target): return False
-                elif op == '==':
-                    if not (value == target): return False
-                elif op == '!=':
-                    if not (value != target): return False
+                if not compare(value, cond['target_value']): return False
             except TypeError:
                 # This happens if comparing incompatible types, e.g., string and float.
                 # In this case, the condition is considered not met.
@@ -1321,13 +1344,13 @@ def mutate(genotype: Genotype, settings: Dict) -> Genotype:
     # --- 1. Parameter Mutations (tweak existing rules) ---
     for rule in mutated.rule_genes:
         if random.random() < mut_rate:
-            rule.probability = np.clip(rule.probability + np.random.normal(0, 0.1), 0.1, 1.0)
+            rule.probability = min(max(rule.probability + RNG.normal(0, 0.1), 0.1), 1.0)
         if random.random() < mut_rate:
             rule.priority += random.randint(-1, 1)
         if rule.conditions and random.random() < mut_rate:
             cond_to_mutate = random.choice(rule.conditions)
             if isinstance(cond_to_mutate['target_value'], (int, float)):
-                cond_to_mutate['target_value'] *= np.random.lognormal(0, 0.1)
+                cond_to_mutate['target_value'] *= RNG.lognormal(0, 0.1)
 
     # --- 2. Structural Mutations (add/remove/change rules) ---
     if random.random() < innov_rate:
@@ -1350,9 +1373,9 @@ def mutate(genotype: Genotype, settings: Dict) -> Genotype:
     if settings.get('enable_hyperparameter_evolution', False):
         hyper_mut_rate = settings.get('hyper_mutation_rate', 0.05)
         if random.random() < hyper_mut_rate and 'mutation_rate' in settings.get('evolvable_params', []):
-            mutated.evolvable_mutation_rate = np.clip(mutated.evolvable_mutation_rate * np.random.lognormal(0, 0.1), 0.01, 0.9)
+            mutated.evolvable_mutation_rate = min(max(mutated.evolvable_mutation_rate * RNG.lognormal(0, 0.1), 0.01), 0.9)
         if random.random() < hyper_mut_rate and 'innovation_rate' in settings.get('evolvable_params', []):
-            mutated.evolvable_innovation_rate = np.clip(mutated.evolvable_innovation_rate * np.random.lognormal(0, 0.1), 0.01, 0.5)
+            mutated.evolvable_innovation_rate = min(max(mutated.evolvable_innovation_rate * RNG.lognormal(0, 0.1), 0.01), 0.5)
 
     # --- 5. Objective Mutation (Evolving the Goal Itself) ---
     if settings.get('enable_objective_evolution', False):
@@ -1364,7 +1387,7 @@ def mutate(genotype: Genotype, settings: Dict) -> Genotype:
             objective_to_change = random.choice(list(mutated.objective_weights.keys()))
             # Mutate it slightly
             current_val = mutated.objective_weights[objective_to_change]
-            mutated.objective_weights[objective_to_change] = current_val + np.random.normal(0, 0.05)
+            mutated.objective_weights[objective_to_change] = current_val + RNG.normal(0, 0.05)
             # (No clipping here to allow for negative weights, which can be interesting)
 
     mutated.complexity = mutated.compute_complexity()
@@ -1507,11 +1530,11 @@ def innovate_component(genotype: Optional[Genotype], settings: Dict, force_base:
         if random.random() < (abs(bias) + 0.05):
             base_val = random.uniform(0.5, 1.5)
             # Apply bias (e.g., bias of 0.8 means value is likely 0.8-1.5, bias of -0.2 means 0.0-0.8)
-            val = np.clip(base_val + bias, 0, 5.0)
+            val = min(max(base_val + bias, 0.0), 5.0)
             setattr(new_comp, prop, val)
 
     # --- Final cleanup ---
-    new_comp.mass = np.clip(new_comp.mass, 0.1, 5.0)
+    new_comp.mass = min(max(new_comp.mass, 0.1), 5.0)
     
     return new_comp
 
@@ -1553,7 +1576,7 @@ def apply_physics_drift(settings: Dict):
         # Pick a random property to mutate
         prop_to_mutate = random.choice(list(base_template.keys()))
         
-        drift_magnitude = np.random.normal(0, 0.05) # Small drift
+        drift_magnitude = RNG.normal(0, 0.05) # Small drift
         
         if prop_to_mutate.endswith('_range'):
             # Mutate a range tuple, e.g., 'mass_range': (0.5, 1.5)
@@ -1601,40 +1624,86 @@ def apply_physics_drift(settings: Dict):
 # ========================================================
 
 
+def records_token(records: list) -> Tuple:
+    """
+    Cheap cache fingerprint for the session's record lists (history, metrics,
+    events, gene archive, population). They are only ever appended to or
+    replaced wholesale, so the length plus the first and last entries
+    identifies their contents without hashing every record. The token holds
+    values, never object ids: these caches are shared by all sessions, and
+    CPython reuses the id of a garbage-collected list.
+    """
+    if not records:
+        return (0,)
+    return (len(records), records[0], records[-1])
+
+# --- Shared layout fragments for the compact exhibit cards (built once, not per rerun) ---
+FLUSH_MARGIN = dict(l=0, r=0, t=0, b=0)
+TITLED_MARGIN = dict(l=0, r=0, t=40, b=0)
+COMPACT_CARD_LAYOUT = dict(height=250, title=None, margin=FLUSH_MARGIN)
+
+def phenotype_extent(phenotype: Phenotype, grid: ExhibitGrid) -> Tuple[int, int, int, int]:
+    """
+    Bounding box (x0, y0, width, height) of a grown body, padded by one cell and
+    clipped to the grid. Body heatmaps are drawn over this box, not the whole grid,
+    so a few dozen cells no longer ship a mostly-NaN width x height z-array (plus
+    hover text) to the browser. Grid coordinates are kept on the heatmap axes.
+    """
+    if not phenotype.cells:
+        return 0, 0, grid.width, grid.height
+    xs = [x for x, _ in phenotype.cells]
+    ys = [y for _, y in phenotype.cells]
+    x0, y0 = max(min(xs) - 1, 0), max(min(ys) - 1, 0)
+    x1, y1 = min(max(xs) + 2, grid.width), min(max(ys) + 2, grid.height)
+    return x0, y0, x1 - x0, y1 - y0
+
+def phenotype_cell_index(phenotype: Phenotype, x0: int, y0: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Box-relative (row, col) index arrays of a body's cells, in phenotype.cells
+    order. Heatmaps fill all cells with one fancy-indexed assignment
+    (map[rows, cols] = values) instead of a per-cell Python store.
+    """
+    coords = np.array(list(phenotype.cells), dtype=np.intp).reshape(-1, 2)
+    return coords[:, 0] - x0, coords[:, 1] - y0
+
 def visualize_phenotype_mri(phenotype: Phenotype, grid: ExhibitGrid) -> go.Figure:
     """
     Advanced 'MRI' Scan: Visualizes Anatomy, Energy, and Signaling in one view.
     Replaces visualize_phenotype_2d for a deeper look.
     """
-    # Prepare data arrays
-    anatomy_map = np.full((grid.width, grid.height), np.nan)
-    energy_map = np.full((grid.width, grid.height), np.nan)
-    signal_map = np.full((grid.width, grid.height), np.nan)
+    # Prepare data arrays over the body's bounding box (rows are grid x, columns grid y)
+    x0, y0, box_w, box_h = phenotype_extent(phenotype, grid)
+    row_coords, col_coords = np.arange(x0, x0 + box_w), np.arange(y0, y0 + box_h)
+    anatomy_map = np.full((box_w, box_h), np.nan)
+    energy_map = np.full((box_w, box_h), np.nan)
+    signal_map = np.full((box_w, box_h), np.nan)
     
-    # Text labels for hover
-    hover_text = [["" for _ in range(grid.height)] for _ in range(grid.width)]
+    # Text labels for hover (one preallocated object array, not width x height list comprehensions)
+    hover_text = np.full((box_w, box_h), "", dtype=object)
     
     # Map component names to numeric IDs for color mapping
     unique_comps = sorted(list(set(c.component.name for c in phenotype.cells.values())))
     comp_to_id = {name: i for i, name in enumerate(unique_comps)}
     
-    for (x, y), cell in phenotype.cells.items():
-        anatomy_map[x, y] = comp_to_id[cell.component.name]
-        energy_map[x, y] = cell.energy
-        
-        # For signaling, we visualize the average intensity of outgoing signals
-        signals = cell.state_vector.get('signals_out', {})
-        if signals:
-            signal_map[x, y] = sum(signals.values()) / len(signals)
-        else:
-            signal_map[x, y] = 0.0
+    cells = list(phenotype.cells.values())
+    rows, cols = phenotype_cell_index(phenotype, x0, y0)
 
-        hover_text[x][y] = (
-            f"<b>{cell.component.name}</b><br>"
-            f"Energy: {cell.energy:.2f}<br>"
-            f"Age: {cell.age}<br>"
-            f"Signal Output: {signal_map[x, y]:.2f}"
-        )
+    # For signaling, we visualize the average intensity of outgoing signals
+    signal_levels = []
+    for cell in cells:
+        signals = cell.state_vector.get('signals_out', {})
+        signal_levels.append(sum(signals.values()) / len(signals) if signals else 0.0)
+
+    anatomy_map[rows, cols] = [comp_to_id[cell.component.name] for cell in cells]
+    energy_map[rows, cols] = [cell.energy for cell in cells]
+    signal_map[rows, cols] = signal_levels
+    hover_text[rows, cols] = [
+        f"<b>{cell.component.name}</b><br>"
+        f"Energy: {cell.energy:.2f}<br>"
+        f"Age: {cell.age}<br>"
+        f"Signal Output: {signal:.2f}"
+        for cell, signal in zip(cells, signal_levels)
+    ]
 
     # Create Subplots
     fig = make_subplots(
@@ -1649,23 +1718,26 @@ def visualize_phenotype_mri(phenotype: Phenotype, grid: ExhibitGrid) -> go.Figur
     # Fallback if no components
     if not comp_colors: comp_colors = ["#888888"]
     
-    fig.add_trace(go.Heatmap(
-        z=anatomy_map, text=hover_text, hoverinfo='text',
+    anatomy_trace = go.Heatmap(
+        z=anatomy_map, x=col_coords, y=row_coords, text=hover_text, hoverinfo='text',
         colorscale=[[i/(len(comp_colors)-1), c] for i, c in enumerate(comp_colors)] if len(comp_colors) > 1 else 'Greys',
         showscale=False, name="Structure"
-    ), row=1, col=1)
+    )
 
     # 2. Energy Plot (Thermodynamic)
-    fig.add_trace(go.Heatmap(
-        z=energy_map, text=hover_text, hoverinfo='text',
+    energy_trace = go.Heatmap(
+        z=energy_map, x=col_coords, y=row_coords, text=hover_text, hoverinfo='text',
         colorscale='Inferno', showscale=False, name="Energy"
-    ), row=1, col=2)
+    )
 
     # 3. Signal Plot (Cybernetic)
-    fig.add_trace(go.Heatmap(
-        z=signal_map, text=hover_text, hoverinfo='text',
+    signal_trace = go.Heatmap(
+        z=signal_map, x=col_coords, y=row_coords, text=hover_text, hoverinfo='text',
         colorscale='Electric', showscale=False, name="Signals"
-    ), row=1, col=3)
+    )
+
+    # All three panels go in with one add_traces call (one validation pass over fig.data)
+    fig.add_traces([anatomy_trace, energy_trace, signal_trace], rows=[1, 1, 1], cols=[1, 2, 3])
 
     fig.update_layout(
         height=400, 
@@ -1678,11 +1750,15 @@ def visualize_phenotype_mri(phenotype: Phenotype, grid: ExhibitGrid) -> go.Figur
     
     return fig
 
-def visualize_grn_sankey(genotype: Genotype) -> go.Figure:
+@st.cache_resource(show_spinner=False, max_entries=64)
+def visualize_grn_sankey(genome_key: str, _genotype: Genotype) -> go.Figure:
     """
     Replaces the hairball graphs with a Logic Flow Circuit (Sankey Diagram).
     Visualizes: SENSORS -> LOGIC GATES -> ACTUATORS
+    Cached per genome_key (the genotype's genome_digest()), so the gallery and
+    elite tabs reuse the figure across reruns. Read-only.
     """
+    genotype = _genotype
     labels = []
     sources = []
     targets = []
@@ -1763,12 +1839,140 @@ def visualize_grn_sankey(genotype: Genotype) -> go.Figure:
     )
     return fig
 
+def build_component_pie(component_counts: Counter, genotype: Genotype, hole: float = 0.0) -> go.Figure:
+    """
+    Pie of a grown body's cell components, colored by the genotype's component genes.
+    A bare go.Pie over the Counter: no DataFrame and no px grouping/color-mapping pass.
+    """
+    color_map = {c.name: c.color for c in genotype.component_genes.values()}
+    names = list(component_counts)
+    return go.Figure(go.Pie(
+        labels=names, values=list(component_counts.values()), hole=hole,
+        marker=dict(colors=[color_map.get(name, '#888888') for name in names])
+    ))
+
+@st.cache_resource(show_spinner=False, max_entries=8, hash_funcs={list: records_token})
+def build_dynasty_records(history: List[Dict], gene_archive: List[Genotype], lineage_ids: Tuple[str, ...]) -> Tuple[pd.DataFrame, Dict[str, Dict]]:
+    """
+    Everything the Dynastic Histories panel shows, prepared for all listed
+    dynasties at once: one groupby over their history rows and one scan of the
+    fossil record for their apex and ancestor specimens (previously one history
+    mask and three archive scans per selection). Returns the exhibit-average
+    trajectory and a dict of per-dynasty records. Callers must treat both as read-only.
+    """
+    history_df = build_records_frame(history)
+    universe_avg_df = history_df.groupby('generation')[['fitness', 'complexity']].mean().reset_index()
+
+    dynasties = {}
+    dynasty_rows = history_df[history_df['lineage_id'].isin(lineage_ids)].sort_values('generation', kind='stable')
+    for lineage_id, lineage_df in dynasty_rows.groupby('lineage_id', sort=False):
+        dynasties[lineage_id] = {
+            'lineage_df': lineage_df,
+            'founder': lineage_df.iloc[0],
+            'peak': lineage_df.loc[lineage_df['fitness'].idxmax()],
+            'last_known': lineage_df.iloc[-1]
+        }
+
+    # Fittest archived genotype per dynasty, and per (epoch, dynasty), in a single pass
+    best_in_lineage: Dict[str, Genotype] = {}
+    best_in_epoch: Dict[Tuple[int, str], Genotype] = {}
+    for g in gene_archive:
+        if g.lineage_id not in dynasties:
+            continue
+        best = best_in_lineage.get(g.lineage_id)
+        if best is None or g.fitness > best.fitness:
+            best_in_lineage[g.lineage_id] = g
+        best = best_in_epoch.get((g.generation, g.lineage_id))
+        if best is None or g.fitness > best.fitness:
+            best_in_epoch[(g.generation, g.lineage_id)] = g
+
+    for lineage_id, dynasty in dynasties.items():
+        dynasty['apex_specimen'] = best_in_lineage.get(lineage_id)
+        ancestors = {}
+        for role, member in (('Founder', dynasty['founder']), ('Apex', dynasty['peak']), ('Last Known', dynasty['last_known'])):
+            candidate = best_in_epoch.get((member['generation'], lineage_id))
+            if candidate:
+                ancestors[role] = candidate
+        dynasty['ancestors'] = ancestors
+    return universe_avg_df, dynasties
+
+@st.cache_resource(show_spinner=False, max_entries=4, hash_funcs={list: records_token})
+def build_pantheon_of_components(gene_archive: List[Genotype], population: Optional[List[Genotype]], last_gen: int, top_n: int = 5) -> List[Dict]:
+    """
+    Scores every component in the fossil record (mean fitness of its carriers,
+    longevity, prevalence in the final population) and returns the top_n, each
+    with its prevalence-over-time figure. One archive scan per exhibit state
+    instead of one per Chronicle rerun. Callers must treat the result as read-only.
+    """
+    all_components = {}
+    for genotype in gene_archive:
+        for comp_name, comp_gene in genotype.component_genes.items():
+            if comp_name not in all_components:
+                all_components[comp_name] = {
+                    'gene': comp_gene,
+                    'first_gen': genotype.generation,
+                    'inventor_lineage': genotype.lineage_id,
+                    'fitness_sum': 0,
+                    'usage_count': 0,
+                    'prevalence_history': Counter()
+                }
+            all_components[comp_name]['fitness_sum'] += genotype.fitness
+            all_components[comp_name]['usage_count'] += 1
+            all_components[comp_name]['prevalence_history'][genotype.generation] += 1
+
+    # Carriers of each component in the final population, counted in one pass
+    final_carriers = Counter(name for g in population or [] for name in g.component_genes)
+
+    for name, data in all_components.items():
+        avg_fitness = data['fitness_sum'] / data['usage_count'] if data['usage_count'] > 0 else 0
+        longevity = last_gen - data['first_gen']
+        data['score'] = (avg_fitness * 100) + (longevity * 0.1) + (final_carriers[name] * 1)
+
+    top_components = sorted(all_components.values(), key=lambda x: x['score'], reverse=True)[:top_n]
+    for data in top_components:
+        history = data['prevalence_history']
+        prevalence_gens = sorted(history)
+        data['prevalence_figure'] = go.Figure(
+            data=go.Scatter(
+                x=prevalence_gens, y=[history[g] for g in prevalence_gens],
+                mode='lines', fill='tozeroy', name='count'
+            ),
+            layout=dict(title="Prevalence Over Time", xaxis_title='generation', yaxis_title='count', height=200, margin=dict(l=0, r=0, t=30, b=0))
+        )
+    return top_components
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def build_elite_strategy_figures(elite_ids: Tuple[str, ...], _elites: List[Genotype]) -> Tuple[go.Figure, go.Figure]:
+    """
+    The Pantheon's two elite-strategy bar charts (GRN action and condition counts).
+    Keyed on the elites' ids, so toggling other Chronicle widgets reuses both
+    finished figures instead of re-tallying and rebuilding them. Read-only.
+    """
+    elite_actions = Counter()
+    elite_conditions = Counter()
+    for elite in _elites:
+        elite_actions.update(r.action_type for r in elite.rule_genes)
+        for r in elite.rule_genes:
+            elite_conditions.update(c['source'] for c in r.conditions)
+
+    figures = []
+    for counts, axis_name, title in (
+        (elite_actions, 'Action', "Elite Strategic Blueprint (GRN Actions)"),
+        (elite_conditions, 'Condition', "Elite Sensory Profile (GRN Conditions)")
+    ):
+        ranked = counts.most_common()
+        fig = go.Figure(go.Bar(x=[name for name, _ in ranked], y=[count for _, count in ranked]))
+        fig.update_layout(title=title, xaxis_title=axis_name, yaxis_title='Count', height=250, margin=TITLED_MARGIN)
+        figures.append(fig)
+    return figures[0], figures[1]
+
 def visualize_phenotype_2d(phenotype: Phenotype, grid: ExhibitGrid) -> go.Figure:
     """
     Creates a 2D heatmap visualization of the organism's body plan.
     """
-    cell_data = np.full((grid.width, grid.height), np.nan)
-    cell_text = [["" for _ in range(grid.height)] for _ in range(grid.width)]
+    x0, y0, box_w, box_h = phenotype_extent(phenotype, grid)
+    cell_data = np.full((box_w, box_h), np.nan)
+    cell_text = np.full((box_w, box_h), "", dtype=object)
     
     # Map component names to colors
     component_colors = {comp.name: comp.color for comp in phenotype.genotype.component_genes.values()}
@@ -1797,18 +2001,22 @@ def visualize_phenotype_2d(phenotype: Phenotype, grid: ExhibitGrid) -> go.Figure
             val = i / (n_colors - 1)
             dcolorsc.append([val, color])
 
-    for (x, y), cell in phenotype.cells.items():
-        cell_data[x, y] = color_map.get(cell.component.name, 0)
-        cell_text[x][y] = (
-            f"<b>{cell.component.name}</b> (Base: {cell.component.base_kingdom})<br>"
-            f"Energy: {cell.energy:.2f}<br>"
-            f"Age: {cell.age}<br>"
-            f"Mass: {cell.component.mass:.2f}<br>"
-            f"Photosynthesis: {cell.component.photosynthesis:.2f}"
-        )
+    cells = list(phenotype.cells.values())
+    rows, cols = phenotype_cell_index(phenotype, x0, y0)
+    cell_data[rows, cols] = [color_map.get(cell.component.name, 0) for cell in cells]
+    cell_text[rows, cols] = [
+        f"<b>{cell.component.name}</b> (Base: {cell.component.base_kingdom})<br>"
+        f"Energy: {cell.energy:.2f}<br>"
+        f"Age: {cell.age}<br>"
+        f"Mass: {cell.component.mass:.2f}<br>"
+        f"Photosynthesis: {cell.component.photosynthesis:.2f}"
+        for cell in cells
+    ]
 
     fig = go.Figure(data=go.Heatmap(
         z=cell_data,
+        x=np.arange(y0, y0 + box_h),
+        y=np.arange(x0, x0 + box_w),
         text=cell_text,
         hoverinfo="text",
         colorscale=dcolorsc,
@@ -1831,12 +2039,16 @@ def visualize_phenotype_2d(phenotype: Phenotype, grid: ExhibitGrid) -> go.Figure
     )
     return fig
 
-def visualize_fitness_landscape(history_df: pd.DataFrame):
-    if history_df.empty or len(history_df) < 20:
-        st.warning("Not enough data to render fitness landscape.")
-        return
-        
-    st.markdown("### 3D Fitness Landscape: (Fitness vs. Complexity vs. Cell Count)")
+@st.cache_data(show_spinner=False, max_entries=8, hash_funcs={list: records_token})
+def build_fitness_landscape_figure(history: List[Dict]) -> Optional[go.Figure]:
+    """
+    Builds the 3D fitness landscape figure. Cached on the history list's
+    records_token (hashing the frame itself fails on its parent_ids lists and
+    falls back to pickling it), so reruns that don't change the exhibit skip
+    the binning, the trajectory groupbys and the Plotly figure construction.
+    Returns None if the population lacks the variance to build a surface.
+    """
+    history_df = build_records_frame(history)
     sample_size = min(len(history_df), 20000)
     df_sample = history_df.sample(n=sample_size)
     
@@ -1846,8 +2058,7 @@ def visualize_fitness_landscape(history_df: pd.DataFrame):
     
     # --- 1. Create the Fitness Surface ---
     if df_sample[x_param].nunique() < 2 or df_sample[y_param].nunique() < 2:
-        st.warning("Not enough variance in population to create 3D landscape.")
-        return
+        return None
         
     x_bins = np.linspace(df_sample[x_param].min(), df_sample[x_param].max(), 30)
     y_bins = np.linspace(df_sample[y_param].min(), df_sample[y_param].max(), 30)
@@ -1905,8 +2116,318 @@ def visualize_fitness_landscape(history_df: pd.DataFrame):
         height=700,
         margin=dict(l=0, r=0, b=0, t=60)
     )
+    return fig
+
+def visualize_fitness_landscape(history: List[Dict]):
+    if len(history) < 20:
+        st.warning("Not enough data to render fitness landscape.")
+        return
+        
+    st.markdown("### 3D Fitness Landscape: (Fitness vs. Complexity vs. Cell Count)")
+    fig = build_fitness_landscape_figure(history)
+    if fig is None:
+        st.warning("Not enough variance in population to create 3D landscape.")
+        return
     st.plotly_chart(fig, width='stretch', key="fitness_landscape_3d_museum")
 
+@st.cache_resource(show_spinner=False, max_entries=8, hash_funcs={list: records_token})
+def build_phylogeny_graph(history: List[Dict]) -> nx.DiGraph:
+    """
+    Builds the kingdom-level Tree of Life from the exhibit history.
+    Cached as a shared resource on the history list's records_token (the
+    frame's parent_ids lists defeat Streamlit's DataFrame hash): the graph only
+    changes when the history does, so widget reruns reuse it. Callers must
+    treat it as read-only.
+    """
+    history_df = build_records_frame(history)
+    phylogeny_graph = nx.DiGraph()
+    # Find the first occurrence of each kingdom
+    first_occurrence = history_df.loc[history_df.groupby('kingdom_id', observed=True)['generation'].idxmin()]
+    
+    for _, row in first_occurrence.iterrows():
+        kingdom = row['kingdom_id']
+        gen = row['generation']
+        phylogeny_graph.add_node(kingdom, label=f"{kingdom}\n(Epoch {gen})")
+
+        # Find parent lineage
+        parent_ids_list = history_df.loc[history_df['lineage_id'] == row['lineage_id'], 'parent_ids'].iloc[0]
+        
+        if isinstance(parent_ids_list, list) and len(parent_ids_list) > 0:
+            first_parent_id = parent_ids_list[0]
+            parent_df = history_df[history_df['lineage_id'] == first_parent_id]
+            
+            if not parent_df.empty:
+                parent_kingdom = parent_df.iloc[0]['kingdom_id']
+                if parent_kingdom != kingdom and parent_kingdom in phylogeny_graph.nodes():
+                    phylogeny_graph.add_edge(parent_kingdom, kingdom)
+    return phylogeny_graph
+
+def figure_png(fig) -> bytes:
+    """Saves a matplotlib figure as PNG bytes and closes it, so cached renders don't leak figures."""
+    import matplotlib.pyplot as plt
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', bbox_inches='tight')
+    plt.close(fig)
+    return buffer.getvalue()
+
+def dot_quote(text: str) -> str:
+    """Quotes a string as a DOT id/label (backslashes, quotes and newlines escaped)."""
+    return '"' + str(text).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+
+# --- Graphviz engines offered for the Tree of Life: dot for small trees, the
+# --- force-directed fdp/sfdp scale better as kingdoms multiply ---
+PHYLOGENY_LAYOUT_ENGINES = ("dot", "fdp", "sfdp", "neato", "twopi")
+
+@st.cache_data(show_spinner=False, max_entries=16, hash_funcs={list: records_token})
+def build_phylogeny_dot(history: List[Dict], engine: str = "dot") -> Optional[str]:
+    """
+    The Tree of Life as DOT source, built once per (history, engine). The
+    engine goes in the graph's layout attribute. render_phylogeny_svg lays it
+    out on the server when Graphviz is installed; otherwise st.graphviz_chart
+    lays it out and draws it in the browser (WASM Graphviz).
+    Returns None if there are no kingdoms.
+    """
+    phylogeny_graph = build_phylogeny_graph(history)
+    if not phylogeny_graph.nodes():
+        return None
+
+    lines = [
+        'digraph phylogeny {',
+        f'  graph [layout={engine}, label="Phylogeny of Kingdoms", labelloc=t, bgcolor=transparent, fontcolor="#cccccc"];',
+        '  node [shape=ellipse, style=filled, fillcolor="#9E7676", fontcolor=white, fontsize=10, color="#9E7676"];',
+        '  edge [color="#cccccc"];'
+    ]
+    for kingdom, label in phylogeny_graph.nodes(data='label'):
+        lines.append(f'  {dot_quote(kingdom)} [label={dot_quote(label)}];')
+    for parent, child in phylogeny_graph.edges():
+        lines.append(f'  {dot_quote(parent)} -> {dot_quote(child)};')
+    lines.append('}')
+    return "\n".join(lines)
+
+# --- What a server-side Graphviz render can raise: pydot missing, the layout
+# program missing (OSError) or exiting with an error (pydot asserts on its
+# return code, e.g. for an engine such as sfdp that was not built in) ---
+GRAPHVIZ_RENDER_ERRORS = (ImportError, OSError, AssertionError)
+
+@st.cache_data(show_spinner=False, max_entries=16, hash_funcs={list: records_token})
+def render_phylogeny_svg(history: List[Dict], engine: str = "dot") -> Optional[str]:
+    """
+    The Tree of Life laid out once on the server (Graphviz via pydot) as inline
+    SVG markup. The page then embeds finished markup instead of having the
+    browser re-run WASM Graphviz on every render. Returns None when there are no
+    kingdoms. Raises GRAPHVIZ_RENDER_ERRORS, uncached, when Graphviz cannot
+    render it here; callers then fall back to st.graphviz_chart.
+    """
+    phylogeny_dot = build_phylogeny_dot(history, engine)
+    if phylogeny_dot is None:
+        return None
+    import pydot
+    svg = pydot.graph_from_dot_data(phylogeny_dot)[0].create_svg().decode('utf-8')
+    # Drop the XML prolog and DOCTYPE, which are not valid inside an HTML body
+    return svg[svg.find('<svg'):]
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def build_grn_graph(genome_key: str, _genotype: Genotype) -> nx.DiGraph:
+    """
+    Builds the Genetic Regulatory Network graph of a genotype, cached per
+    genome_key (the genotype's genome_digest(), so identical genomes share it
+    and distinct ones never collide). Callers must treat the graph as read-only.
+    """
+    G = nx.DiGraph()
+    for comp_name, comp_gene in _genotype.component_genes.items():
+        G.add_node(comp_name, type='component', color=comp_gene.color)
+    for rule in _genotype.rule_genes:
+        action_node = f"{rule.action_type}\n({rule.action_param})"
+        G.add_node(action_node, type='action', color='#FFB347')
+        
+        source_node = list(_genotype.component_genes.keys())[0]
+        if rule.conditions:
+            type_cond = next((c for c in rule.conditions if c['source'] == 'self_type'), None)
+            if type_cond and type_cond['target_value'] in G.nodes():
+                source_node = type_cond['target_value']
+                
+        G.add_edge(source_node, action_node, label=f"P={rule.probability:.1f}")
+        if rule.action_param in G.nodes():
+            G.add_edge(action_node, rule.action_param)
+    return G
+
+# --- Record columns holding a handful of repeated labels, stored as pandas categoricals ---
+CATEGORICAL_RECORD_COLUMNS = ('kingdom_id',)
+
+@st.cache_data(show_spinner=False, max_entries=8, hash_funcs={list: records_token})
+def build_records_frame(records: List[Dict]) -> pd.DataFrame:
+    """
+    Builds a DataFrame from a list of per-organism (or per-generation) records.
+    Dict-of-records inference is slow for a long exhibit history, so the frame
+    is built once per history and reused by every rerun until it changes.
+    Float columns are downcast to float32 to halve what the cache copy, the
+    groupbys and Plotly's JSON serializer have to move. Integer columns
+    (generation, lifespan, cell_count, ...) stay int64: their values feed
+    later arithmetic and metrics, where a narrow dtype would silently overflow.
+    Kingdom labels become categoricals (small int codes), so the per-kingdom
+    groupbys hash integers instead of strings. Group them with observed=True.
+    """
+    frame = pd.DataFrame(records)
+    for col in frame.select_dtypes(include='float').columns:
+        frame[col] = frame[col].astype(np.float32)
+    for col in CATEGORICAL_RECORD_COLUMNS:
+        if col in frame:
+            frame[col] = frame[col].astype('category')
+    return frame
+
+# --- Template for a single entry of the Genesis Chronicle log ---
+GENESIS_EVENT_HTML = (
+    '<div style="border-left: 3px solid #9E7676; padding-left: 10px; margin-bottom: 15px; border-radius: 3px;">'
+    '<small>Epoch {generation}</small><br>'
+    '<strong>{icon} {title}</strong>'
+    '<p style="font-size: 0.9em; color: #ccc;">{description}</p>'
+    '</div>'
+)
+
+# --- Event types featured in the Hall of Innovation, and those that close an epoch ---
+INNOVATION_EVENT_TYPES = frozenset({
+    'Component Innovation', 'Sense Innovation', 'Endosymbiosis', 'Genesis',
+    'Complexity Leap', 'Major Transition', 'Cognitive Leap'
+})
+EPOCH_BREAK_EVENT_TYPES = frozenset({'Cataclysm', 'Genesis', 'Succession'})
+
+@st.cache_data(show_spinner=False, max_entries=8, hash_funcs={list: records_token})
+def index_genesis_events(events: List[Dict]) -> Tuple[List[Dict], np.ndarray, np.ndarray]:
+    """
+    Sorts the Genesis Chronicle by epoch once and exposes the epoch and type
+    columns as arrays, so the timeline filters become vectorized masks
+    instead of a Python scan over every event on each slider drag.
+    The event list is append-only, so it is fingerprinted rather than hashed.
+    """
+    sorted_events = sorted(events, key=lambda e: e['generation'])
+    generations = np.array([e['generation'] for e in sorted_events], dtype=np.int64)
+    types = np.array([e['type'] for e in sorted_events], dtype=object)
+    return sorted_events, generations, types
+
+# Kept in memory on purpose, like every cache here: persist="disk" entries are
+# never evicted (max_entries only bounds the in-memory copy) and outlive a
+# Decommission, so the cache directory would grow without limit.
+@st.cache_data(show_spinner=False, max_entries=256)
+def compute_graphviz_layout(genome_key: str, prog: str, _G: nx.DiGraph) -> Dict[str, Tuple[float, float]]:
+    """
+    Graphviz node positions for a genotype's GRN. Every call shells out to a
+    Graphviz program through pydot, so positions are memoized per (genome, prog).
+    Raises ImportError, uncached, when pydot is unavailable.
+    """
+    return nx.nx_pydot.graphviz_layout(_G, prog=prog)
+
+# --- The Specimen Gallery's GRN views, in display order: (label, heading, layout) ---
+GRN_VIEWS = (
+    ("GRN", "Genetic Regulatory Network (GRN)", 'spring'),
+    ("GRN 2", "Genetic Regulatory Network (GRN) 2", 'kamada_kawai'),
+    ("GRN 3", "Genetic Regulatory Network (GRN) 3", 'circular'),
+    ("GRN 4", "Genetic Regulatory Network (GRN) 4", 'random'),
+    ("GRN 5", "Genetic Regulatory Network (GRN) 5", 'spectral'),
+    ("GRN 6", "Genetic Regulatory Network (GRN) 6", 'shell'),
+    ("GRN 7", "Genetic Regulatory Network (GRN) 7", 'spiral'),
+    ("GRN 8", "Genetic Regulatory Network (GRN) 8", 'planar'),
+    ("GRN 9", "Genetic Regulatory Network (GRN) 9", 'spring_tight'),
+    ("GRN 10", "Genetic Regulatory Network (GRN) 10", 'spring_loose'),
+    ("GRN 11", "Genetic Regulatory Network (GRN) 11", 'shell_by_type'),
+    ("GRN 12", "Genetic Regulatory Network (GRN) 12", 'spring_long'),
+    ("GRN 13", "Genetic Regulatory Network (GRN) 13: Hierarchical (Top-Down)", 'dot'),
+    ("GRN 14", "Genetic Regulatory Network (GRN) 14: Hierarchical (Radial)", 'twopi'),
+    ("GRN 15", "Genetic Regulatory Network (GRN) 15: Force-Directed (NEATO)", 'neato'),
+    ("GRN 16", "Genetic Regulatory Network (GRN) 16: Spring Layout (Alternate Seed)", 'spring_alt'),
+)
+
+# --- networkx layouts by name (the Graphviz programs go through compute_graphviz_layout) ---
+GRN_LAYOUTS = {
+    'spring': lambda G: nx.spring_layout(G, k=0.9, seed=42),
+    'kamada_kawai': nx.kamada_kawai_layout,
+    'circular': nx.circular_layout,
+    'random': lambda G: nx.random_layout(G, seed=42),
+    'spectral': nx.spectral_layout,
+    'shell': nx.shell_layout,
+    'spiral': nx.spiral_layout,
+    'spring_tight': lambda G: nx.spring_layout(G, k=0.1, seed=42),
+    'spring_loose': lambda G: nx.spring_layout(G, k=2.0, seed=42),
+    'shell_by_type': lambda G: nx.shell_layout(G, nlist=[
+        [n for n, data in G.nodes(data=True) if data.get('type') == node_type]
+        for node_type in ('component', 'action')
+    ]),
+    'spring_long': lambda G: nx.spring_layout(G, iterations=200, seed=42),
+    'spring_fallback': lambda G: nx.spring_layout(G, seed=13),
+    'spring_alt': lambda G: nx.spring_layout(G, seed=99),
+}
+GRAPHVIZ_PROGS = ('dot', 'twopi', 'neato')
+PYDOT_FALLBACK_LAYOUTS = {'dot': 'spring_fallback'}
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def render_grn_png(genome_key: str, layout: str, _G: nx.DiGraph) -> Tuple[bytes, Optional[str]]:
+    """
+    Draws one GRN view of a genotype and returns (PNG bytes, caption or None).
+    Memoized per (genome, layout), so reruns reuse the sixteen gallery images
+    instead of laying out and rendering every view again.
+    Graphviz layouts raise ImportError, uncached, when pydot is unavailable.
+    """
+    import matplotlib.pyplot as plt
+    note = None
+    if layout in GRAPHVIZ_PROGS:
+        pos = compute_graphviz_layout(genome_key, layout, _G)
+    elif layout == 'planar':
+        try:
+            pos = nx.planar_layout(_G)
+        except nx.NetworkXException:
+            note = "Not planar, falling back to random."
+            pos = nx.random_layout(_G, seed=43)
+    else:
+        pos = GRN_LAYOUTS[layout](_G)
+
+    fig_grn, ax = plt.subplots(figsize=(4, 3))
+    node_colors = [data.get('color', '#888888') for _, data in _G.nodes(data=True)]
+    nx.draw(_G, pos, ax=ax, with_labels=False, node_size=500, node_color=node_colors, font_size=6, width=0.5, arrowsize=8)
+    labels = {n: n.split('\n')[0] for n in _G.nodes()}
+    nx.draw_networkx_labels(_G, pos, labels=labels, font_size=7, ax=ax)
+    return figure_png(fig_grn), note
+
+def genesis_event_window(event_generations: np.ndarray, first_gen: int, last_gen: int) -> slice:
+    """
+    Slice of the epoch-sorted Chronicle covering epochs first_gen..last_gen
+    (inclusive), found by binary search instead of scanning every event.
+    """
+    return slice(
+        int(np.searchsorted(event_generations, first_gen, side='left')),
+        int(np.searchsorted(event_generations, last_gen, side='right'))
+    )
+
+def summarize_generations(history_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-generation trait means and spreads, computed in a single groupby pass
+    instead of one groupby per dashboard panel. Not cached itself: its only
+    caller builds the dashboard inside build_dashboard_figure, which is cached
+    per history, and hashing the frame (parent_ids holds lists) would fail.
+    """
+    return history_df.groupby('generation').agg(
+        mean_energy_production=('energy_production', 'mean'),
+        mean_energy_consumption=('energy_consumption', 'mean'),
+        mean_complexity=('complexity', 'mean'),
+        mean_cell_count=('cell_count', 'mean'),
+        mean_lifespan=('lifespan', 'mean'),
+        std_cell_count=('cell_count', 'std'),
+        std_complexity=('complexity', 'std'),
+    )
+
+# --- Y-axis titles of the dashboard panels: (row, col, secondary_y, title) ---
+DASHBOARD_Y_AXIS_TITLES = (
+    (1, 1, False, "Fitness"),
+    (1, 2, False, "Mean Energy"),
+    (1, 3, False, "Count"),
+    (2, 1, False, "Population %"),
+    (2, 2, False, "Diversity (H)"),
+    (2, 3, False, "Std. Dev (σ)"),
+    (3, 1, False, "Selection Δ"),
+    (3, 1, True, "Mutation Rate μ"),
+    (3, 2, False, "Complexity"),
+    (3, 2, True, "Cell Count"),
+    (3, 3, False, "Generations"),
+)
+
 def create_simulation_dashboard(history_df: pd.DataFrame, evolutionary_metrics_df: pd.DataFrame) -> go.Figure:
     """Comprehensive evolution analytics dashboard."""
     
@@ -1933,18 +2454,26 @@ def create_simulation_dashboard(history_df: pd.DataFrame, evolutionary_metrics_d
     )
     
     # --- Plot 1: Fitness Evolution by Kingdom ---
+    # One groupby for every kingdom (instead of a mask + groupby per kingdom), and the
+    # traces go in with one add_traces call. Kingdoms keep separate traces for the legend.
     unique_kingdoms = history_df['kingdom_id'].unique()
+    fitness_by_kingdom = history_df.groupby(['generation', 'kingdom_id'], observed=True)['fitness'].mean().unstack()
+    palette = px.colors.qualitative.Plotly
+    kingdom_traces = []
     for i, kingdom in enumerate(unique_kingdoms):
-        kingdom_data = history_df[history_df['kingdom_id'] == kingdom]
-        mean_fitness = kingdom_data.groupby('generation')['fitness'].mean()
-        plot_color = px.colors.qualitative.Plotly[i % len(px.colors.qualitative.Plotly)]
-        fig.add_trace(go.Scatter(x=mean_fitness.index, y=mean_fitness.values, mode='lines', name=kingdom, legendgroup=kingdom, line=dict(color=plot_color)), row=1, col=1)
+        mean_fitness = fitness_by_kingdom[kingdom].dropna()
+        kingdom_traces.append(go.Scatter(x=mean_fitness.index, y=mean_fitness.values, mode='lines', name=kingdom, legendgroup=kingdom, line=dict(color=palette[i % len(palette)])))
+    fig.add_traces(kingdom_traces, rows=[1] * len(kingdom_traces), cols=[1] * len(kingdom_traces))
     
+    # --- Per-generation trait summary (one cached groupby pass for plots 2, 6, 8, 9) ---
+    gen_stats = summarize_generations(history_df)
+    generations = gen_stats.index
+
     # --- Plot 2: Phenotypic Trait Trajectories ---
-    mean_energy_prod = history_df.groupby('generation')['energy_production'].mean()
-    mean_energy_cons = history_df.groupby('generation')['energy_consumption'].mean()
-    fig.add_trace(go.Scatter(x=mean_energy_prod.index, y=mean_energy_prod.values, name='Mean Energy Prod.', line=dict(color='green')), row=1, col=2)
-    fig.add_trace(go.Scatter(x=mean_energy_cons.index, y=mean_energy_cons.values, name='Mean Energy Cons.', line=dict(color='red')), row=1, col=2)
+    fig.add_traces([
+        go.Scatter(x=generations, y=gen_stats['mean_energy_production'], name='Mean Energy Prod.', line=dict(color='green')),
+        go.Scatter(x=generations, y=gen_stats['mean_energy_consumption'], name='Mean Energy Cons.', line=dict(color='red'))
+    ], rows=[1, 1], cols=[2, 2])
 
     # --- Plot 3: Final Population Fitness ---
     final_gen_df = history_df[history_df['generation'] == history_df['generation'].max()]
@@ -1952,15 +2481,19 @@ def create_simulation_dashboard(history_df: pd.DataFrame, evolutionary_metrics_d
         fig.add_trace(go.Histogram(x=final_gen_df['fitness'], name='Fitness', marker_color='blue'), row=1, col=3)
 
     # --- Plot 4: Kingdom Dominance ---
-    kingdom_counts = history_df.groupby(['generation', 'kingdom_id']).size().unstack(fill_value=0)
-    kingdom_percentages = kingdom_counts.apply(lambda x: x / x.sum(), axis=1)
-    for kingdom in kingdom_percentages.columns:
-        fig.add_trace(go.Scatter(
+    kingdom_counts = history_df.groupby(['generation', 'kingdom_id'], observed=True).size().unstack(fill_value=0)
+    # Vectorized row normalization (a per-row Python lambda via apply was the old path)
+    kingdom_percentages = kingdom_counts.div(kingdom_counts.sum(axis=1), axis=0)
+    dominance_traces = [
+        go.Scatter(
             x=kingdom_percentages.index, y=kingdom_percentages[kingdom],
             mode='lines', name=kingdom,
             stackgroup='one', groupnorm='percent',
             showlegend=False, legendgroup=kingdom
-        ), row=2, col=1)
+        )
+        for kingdom in kingdom_percentages.columns
+    ]
+    fig.add_traces(dominance_traces, rows=[2] * len(dominance_traces), cols=[1] * len(dominance_traces))
 
     # --- Plot 5: Genetic Diversity ---
     if not evolutionary_metrics_df.empty:
@@ -1970,109 +2503,57 @@ def create_simulation_dashboard(history_df: pd.DataFrame, evolutionary_metrics_d
         ), row=2, col=2)
 
     # --- Plot 6: Phenotypic Divergence ---
-    pheno_divergence = history_df.groupby('generation')[['cell_count', 'complexity']].std().reset_index()
-    fig.add_trace(go.Scatter(x=pheno_divergence['generation'], y=pheno_divergence['cell_count'], name='σ (Cell Count)'), row=2, col=3)
-    fig.add_trace(go.Scatter(x=pheno_divergence['generation'], y=pheno_divergence['complexity'], name='σ (Complexity)'), row=2, col=3)
+    fig.add_traces([
+        go.Scatter(x=generations, y=gen_stats['std_cell_count'], name='σ (Cell Count)'),
+        go.Scatter(x=generations, y=gen_stats['std_complexity'], name='σ (Complexity)')
+    ], rows=[2, 2], cols=[3, 3])
 
     # --- Plot 7: Selection Pressure & Mutation Rate ---
     if not evolutionary_metrics_df.empty:
-        fig.add_trace(go.Scatter(x=evolutionary_metrics_df['generation'], y=evolutionary_metrics_df['selection_differential'], name='Selection Δ', line=dict(color='red')), secondary_y=False, row=3, col=1)
-        fig.add_trace(go.Scatter(x=evolutionary_metrics_df['generation'], y=evolutionary_metrics_df['mutation_rate'], name='Mutation Rate μ', line=dict(color='orange', dash='dash')), secondary_y=True, row=3, col=1)
+        fig.add_traces([
+            go.Scatter(x=evolutionary_metrics_df['generation'], y=evolutionary_metrics_df['selection_differential'], name='Selection Δ', line=dict(color='red')),
+            go.Scatter(x=evolutionary_metrics_df['generation'], y=evolutionary_metrics_df['mutation_rate'], name='Mutation Rate μ', line=dict(color='orange', dash='dash'))
+        ], rows=[3, 3], cols=[1, 1], secondary_ys=[False, True])
 
     # --- Plot 8: Complexity & Cell Count Growth ---
-    arch_stats = history_df.groupby('generation')[['complexity', 'cell_count']].mean().reset_index()
-    fig.add_trace(go.Scatter(x=arch_stats['generation'], y=arch_stats['complexity'], name='Mean Complexity', line=dict(color='cyan')), secondary_y=False, row=3, col=2)
-    fig.add_trace(go.Scatter(x=arch_stats['generation'], y=arch_stats['cell_count'], name='Mean Cell Count', line=dict(color='magenta', dash='dash')), secondary_y=True, row=3, col=2)
+    fig.add_traces([
+        go.Scatter(x=generations, y=gen_stats['mean_complexity'], name='Mean Complexity', line=dict(color='cyan')),
+        go.Scatter(x=generations, y=gen_stats['mean_cell_count'], name='Mean Cell Count', line=dict(color='magenta', dash='dash'))
+    ], rows=[3, 3], cols=[2, 2], secondary_ys=[False, True])
 
     # --- Plot 9: Mean Organism Lifespan ---
-    mean_lifespan = history_df.groupby('generation')['lifespan'].mean().reset_index()
-    fig.add_trace(go.Scatter(x=mean_lifespan['generation'], y=mean_lifespan['lifespan'], name='Mean Lifespan', line=dict(color='gold')), row=3, col=3)
+    fig.add_trace(go.Scatter(x=generations, y=gen_stats['mean_lifespan'], name='Mean Lifespan', line=dict(color='gold')), row=3, col=3)
 
     # --- Layout and Axis Updates ---
+    # Every axis title goes in with the rest of the layout in one update_layout
+    # (one validation pass) instead of eleven separate update_yaxes calls.
+    axis_titles = {
+        fig.get_subplot(row, col, secondary_y=secondary_y).yaxis.plotly_name: dict(title_text=title)
+        for row, col, secondary_y, title in DASHBOARD_Y_AXIS_TITLES
+    }
     fig.update_layout(
         height=1200, showlegend=True,
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        **axis_titles
     )
-    fig.update_yaxes(title_text="Fitness", row=1, col=1)
-    fig.update_yaxes(title_text="Mean Energy", row=1, col=2)
-    fig.update_yaxes(title_text="Count", row=1, col=3)
-    fig.update_yaxes(title_text="Population %", row=2, col=1)
-    fig.update_yaxes(title_text="Diversity (H)", row=2, col=2)
-    fig.update_yaxes(title_text="Std. Dev (σ)", row=2, col=3)
-    fig.update_yaxes(title_text="Selection Δ", secondary_y=False, row=3, col=1)
-    fig.update_yaxes(title_text="Mutation Rate μ", secondary_y=True, row=3, col=1)
-    fig.update_yaxes(title_text="Complexity", secondary_y=False, row=3, col=2)
-    fig.update_yaxes(title_text="Cell Count", secondary_y=True, row=3, col=2)
-    fig.update_yaxes(title_text="Generations", row=3, col=3)
     
     return fig
 
-def plot_fitness_vs_complexity(df: pd.DataFrame, key: str) -> go.Figure:
-    """Scatter plot of fitness vs. complexity, colored by kingdom."""
-    fig = px.scatter(
-        df.sample(min(len(df), 5000)), 
-        x='complexity', 
-        y='fitness', 
-        color='kingdom_id',
-        title='Fitness vs. Complexity',
-        hover_data=['generation', 'cell_count']
-    )
-    fig.update_layout(height=400)
-    return fig
-
-def plot_lifespan_vs_cell_count(df: pd.DataFrame, key: str) -> go.Figure:
-    """Scatter plot of lifespan vs. cell count, colored by fitness."""
-    fig = px.scatter(
-        df.sample(min(len(df), 5000)),
-        x='cell_count',
-        y='lifespan',
-        color='fitness',
-        color_continuous_scale='Viridis',
-        title='Lifespan vs. Cell Count',
-        hover_data=['generation', 'complexity']
-    )
-    fig.update_layout(height=400)
-    return fig
-
-def plot_energy_dynamics(df: pd.DataFrame, key: str) -> go.Figure:
-    """Scatter plot of energy production vs. consumption."""
-    fig = px.scatter(
-        df.sample(min(len(df), 5000)),
-        x='energy_consumption',
-        y='energy_production',
-        color='fitness',
-        color_continuous_scale='Plasma',
-        title='Energy Production vs. Consumption',
-        hover_data=['generation', 'lifespan']
-    )
-    fig.update_layout(height=400)
-    return fig
-
-def plot_complexity_density(df: pd.DataFrame, key: str) -> go.Figure:
-    """2D histogram showing the density of organisms in the complexity/cell_count space."""
-    fig = px.density_heatmap(
-        df,
-        x='complexity',
-        y='cell_count',
-        nbinsx=50, nbinsy=50,
-        title='Density of Morphological Space'
-    )
-    fig.update_layout(height=400)
-    return fig
-
-def plot_fitness_violin_by_kingdom(df: pd.DataFrame, key: str) -> go.Figure:
-    """Violin plot showing fitness distribution for each kingdom."""
-    final_gen_df = df[df['generation'] == df['generation'].max()]
-    if final_gen_df.empty:
-        final_gen_df = df
-    fig = px.violin(final_gen_df, x='kingdom_id', y='fitness', color='kingdom_id', box=True, points="all", title="Final Generation Fitness Distribution by Kingdom")
-    fig.update_layout(height=400)
-    return fig
+@st.cache_resource(show_spinner=False, max_entries=4, hash_funcs={list: records_token})
+def build_dashboard_figure(history: List[Dict], metrics: List[Dict]) -> go.Figure:
+    """
+    The 3x3 trajectory dashboard for the session's history and metrics records.
+    The finished Figure is cached as a shared resource, so reopening the tab or
+    rerunning the page skips every groupby and trace build until the records change.
+    Callers must treat it as read-only.
+    """
+    return create_simulation_dashboard(build_records_frame(history), build_records_frame(metrics))
 
 def plot_complexity_vs_lifespan(df: pd.DataFrame, key: str) -> go.Figure:
     """Scatter plot of complexity vs. lifespan, colored by fitness."""
     fig = px.scatter(
         df.sample(min(len(df), 5000)),
+        render_mode='webgl',
         x='complexity',
         y='lifespan',
         color='fitness',
@@ -2085,11 +2566,11 @@ def plot_complexity_vs_lifespan(df: pd.DataFrame, key: str) -> go.Figure:
 
 def plot_energy_efficiency_over_time(df: pd.DataFrame, key: str) -> go.Figure:
     """Line plot of energy efficiency over generations."""
-    df_copy = df.copy()
-    df_copy['efficiency'] = df_copy['energy_production'] / (df_copy['energy_consumption'] + 1e-6)
-    efficiency_by_gen = df_copy.groupby('generation')['efficiency'].mean().reset_index()
-    fig = px.line(efficiency_by_gen, x='generation', y='efficiency', title='Mean Energy Efficiency Over Time')
-    fig.update_layout(height=400)
+    # Plain graph_objects: no full-history copy and no px melt/grouping layer for one line
+    efficiency = df['energy_production'] / (df['energy_consumption'] + 1e-6)
+    efficiency_by_gen = efficiency.groupby(df['generation']).mean()
+    fig = go.Figure(go.Scatter(x=efficiency_by_gen.index.to_numpy(), y=efficiency_by_gen.to_numpy(), mode='lines', name='efficiency'))
+    fig.update_layout(title='Mean Energy Efficiency Over Time', xaxis_title='generation', yaxis_title='efficiency', height=400)
     return fig
 
 def plot_cell_count_dist_by_kingdom(df: pd.DataFrame, key: str) -> go.Figure:
@@ -2114,6 +2595,7 @@ def plot_complexity_vs_energy_prod(df: pd.DataFrame, key: str) -> go.Figure:
     """Scatter plot of complexity vs. energy production."""
     fig = px.scatter(
         df.sample(min(len(df), 5000)),
+        render_mode='webgl',
         x='complexity',
         y='energy_production',
         color='fitness',
@@ -2128,6 +2610,7 @@ def plot_fitness_scatter_over_time(df: pd.DataFrame, key: str) -> go.Figure:
     """Scatter plot showing all organisms' fitness over generations."""
     fig = px.scatter(
         df.sample(min(len(df), 10000)),
+        render_mode='webgl',
         x='generation',
         y='fitness',
         color='kingdom_id',
@@ -2167,6 +2650,7 @@ def plot_fitness_vs_complexity(df: pd.DataFrame, key: str) -> go.Figure:
     """Scatter plot of fitness vs. complexity, colored by kingdom."""
     fig = px.scatter(
         df.sample(min(len(df), 5000)), 
+        render_mode='webgl',
         x='complexity', 
         y='fitness', 
         color='kingdom_id',
@@ -2180,6 +2664,7 @@ def plot_lifespan_vs_cell_count(df: pd.DataFrame, key: str) -> go.Figure:
     """Scatter plot of lifespan vs. cell count, colored by fitness."""
     fig = px.scatter(
         df.sample(min(len(df), 5000)),
+        render_mode='webgl',
         x='cell_count',
         y='lifespan',
         color='fitness',
@@ -2194,6 +2679,7 @@ def plot_energy_dynamics(df: pd.DataFrame, key: str) -> go.Figure:
     """Scatter plot of energy production vs. consumption."""
     fig = px.scatter(
         df.sample(min(len(df), 5000)),
+        render_mode='webgl',
         x='energy_consumption',
         y='energy_production',
         color='fitness',
@@ -2205,15 +2691,19 @@ def plot_energy_dynamics(df: pd.DataFrame, key: str) -> go.Figure:
     return fig
 
 def plot_complexity_density(df: pd.DataFrame, key: str) -> go.Figure:
-    """2D histogram showing the density of organisms in the complexity/cell_count space."""
-    fig = px.density_heatmap(
-        df,
-        x='complexity',
-        y='cell_count',
-        nbinsx=50, nbinsy=50,
-        title='Density of Morphological Space'
-    )
-    fig.update_layout(height=400)
+    """
+    2D histogram showing the density of organisms in the complexity/cell_count space.
+    Binned server-side, so only the 50x50 counts (not every history row) reach the browser.
+    """
+    points = df[['complexity', 'cell_count']].dropna()
+    counts, x_edges, y_edges = np.histogram2d(points['complexity'].to_numpy(), points['cell_count'].to_numpy(), bins=50)
+    fig = go.Figure(go.Heatmap(
+        x=(x_edges[:-1] + x_edges[1:]) / 2,
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        z=counts.T,
+        colorbar=dict(title='count')
+    ))
+    fig.update_layout(title='Density of Morphological Space', xaxis_title='complexity', yaxis_title='cell_count', height=400)
     return fig
 
 def plot_fitness_violin_by_kingdom(df: pd.DataFrame, key: str) -> go.Figure:
@@ -2225,6 +2715,29 @@ def plot_fitness_violin_by_kingdom(df: pd.DataFrame, key: str) -> go.Figure:
     fig.update_layout(height=400)
     return fig
 
+# --- The Custom Analytics Lab plots, in display order ---
+ANALYTICS_LAB_PLOTS = (
+    plot_fitness_vs_complexity,
+    plot_lifespan_vs_cell_count,
+    plot_energy_dynamics,
+    plot_complexity_density,
+    plot_fitness_violin_by_kingdom,
+    plot_complexity_vs_lifespan,
+    plot_energy_efficiency_over_time,
+    plot_cell_count_dist_by_kingdom,
+    plot_lifespan_dist_by_kingdom,
+    plot_complexity_vs_energy_prod,
+    plot_fitness_scatter_over_time,
+    plot_elite_parallel_coords
+)
+
+@st.cache_resource(show_spinner=False, max_entries=32, hash_funcs={list: records_token})
+def build_analytics_lab_figure(plot_index: int, history: List[Dict]) -> go.Figure:
+    """
+    One Analytics Lab figure for the session history, cached as a shared
+    resource until the history changes. Callers must treat it as read-only.
+    """
+    return ANALYTICS_LAB_PLOTS[plot_index](build_records_frame(history), key=f"custom_plot_{plot_index}")
 
 
 def deserialize_genotype(geno_dict: Dict) -> Genotype:
@@ -2257,230 +2770,927 @@ def deserialize_population(pop_data_list: List[Dict]) -> List[Genotype]:
         reconstructed_pop.append(deserialize_genotype(geno_dict))
     return [g for g in reconstructed_pop if g.fitness != -1] # Filter out any broken ones
 
+def build_exhibit_archive_zip(s: Dict, population: List[Genotype]) -> bytes:
+    """
+    The downloadable exhibit archive (settings, history, gene archive, ...) as
+    zipped JSON. Serializing and deflating the whole fossil record is by far the
+    heaviest step of a results rerun, so the bytes are kept in session_state and
+    rebuilt only when the exhibit itself (records, population, grid, settings) changes.
+    """
+    gene_archive = st.session_state.get('gene_archive', [])
+    exhibit_grid = st.session_state.get('exhibit_grid')
+    fingerprint = (
+        records_token(st.session_state.history),
+        records_token(st.session_state.evolutionary_metrics),
+        records_token(st.session_state.get('genesis_events', [])),
+        records_token(gene_archive),
+        records_token(population or []),
+        id(exhibit_grid)
+    )
+    cached = st.session_state.get('exhibit_archive_zip')
+    if cached is not None and cached[0] == fingerprint and cached[1] == st.session_state.settings:
+        return cached[2]
+
+    final_grid_state = {}
+    if exhibit_grid is not None:
+        final_grid_state = {name: arr.tolist() for name, arr in exhibit_grid.resource_map.items()}
+
+    download_data = {
+        "settings": st.session_state.settings,
+        "history": st.session_state.history,
+        "evolutionary_metrics": st.session_state.evolutionary_metrics,
+        "genesis_events": st.session_state.get('genesis_events', []),
+        "final_population_genotypes": [asdict(g) for g in population] if population else [],
+        "full_gene_archive": [asdict(g) for g in gene_archive],
+        "final_physics_constants": CHEMICAL_BASES_REGISTRY,
+        "final_evolved_senses": st.session_state.get('evolvable_condition_sources', []),
+        "final_grid_state": final_grid_state
+    }
+
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED, allowZip64=True) as zf:
+        json_string = json.dumps(download_data, indent=4, cls=GenotypeJSONEncoder)
+
+        file_name_in_zip = f"exhibit_archive_{s.get('experiment_name', 'run').replace(' ', '_')}.json"
+        zf.writestr(file_name_in_zip, json_string.encode('utf-8'))
+
+    archive_zip = zip_buffer.getvalue()
+    st.session_state.exhibit_archive_zip = (fingerprint, copy.deepcopy(st.session_state.settings), archive_zip)
+    return archive_zip
+
 # ========================================================
 #
-# PART 7: THE STREAMLIT APP (THE "CURATOR'S CONSOLE")
+# PART 7.6: THE EXHIBIT HALL TABS
+#
+# Each results tab is an st.fragment: interacting with a widget inside a
+# tab reruns only that tab instead of the whole console and every other tab.
 #
 # ========================================================
 
-@dataclass
-class RedQueenParasite:
-    """A simple co-evolving digital parasite for the Red Queen dynamic."""
-    target_kingdom_id: str = "Carbon"
+def panel_toggle(panel: str, label: str) -> bool:
+    """
+    Show/hide switch for a tab's heavy panel. The toggle's own value is the
+    state, so a flip is exactly one rerun (of the enclosing tab fragment only)
+    with no flag bookkeeping or second st.rerun() pass.
+    """
+    return st.toggle(label, key=f"show_{panel}")
 
-def main():
-    st.set_page_config(
-        page_title="LIFE BEYOND II: The Museum of Alien Life",
-        layout="wide",
-        page_icon="🏛️",
-        initial_sidebar_state="expanded"
-    )
+# --- Grown specimens are kept across reruns (bounded, oldest evicted first) ---
+GROWN_SPECIMEN_CACHE_SIZE = 16
 
-    # --- DARK GREEN/BROWN/WHITE "TERRA" THEME ---
-    # --- MASTER TERRA THEME CSS ---
-    # --- MASTER TERRA THEME CSS (FINAL) ---
-    st.markdown("""
-        <style>
-        
-        /* === 1. CORE APP & HEADER === */
-            /* Transparent Header */
-            header[data-testid="stHeader"] {
-                background: transparent;
-            }
-            /* Hide Header Decoration Line */
-            [data-testid="stDecoration"] {
-                display: none;
-            }
-            /* Main App Background */
-            .stApp {
-                background-color: #0D1117; /* Near-black */
-                background-image: url("data:image/svg+xml,%3Csvg xmlns='http://www.w3.org/2000/svg' width='40' height='40' viewBox='0 0 40 40'%3E%3Cg fill-rule='evenodd'%3E%3Cg fill='%231A202C' fill-opacity='0.4'%3E%3Cpath d='M0 38.59l2.83-2.83 1.41 1.41L1.41 40H0v-1.41zM0 1.4l2.83 2.83 1.41-1.41L1.41 0H0v1.41zM38.59 40l-2.83-2.83 1.41-1.41L40 38.59V40h-1.41zM40 1.41l-2.83 2.83-1.41-1.41L38.59 0H40v1.41zM20 18.6l2.83-2.83 1.41 1.41L21.41 20l2.83 2.83-1.41 1.41L20 21.41l-2.83 2.83-1.41-1.41L18.59 20l-2.83-2.83 1.41-1.41L20 18.59z'/%3E%3C/g%3E%3C/g%3E%3C/svg%3E");
-                background-size: cover;
-                background-attachment: fixed;
-            }
+def display_specimen_key(genotype: Genotype, s: Dict) -> Tuple[str, str]:
+    """
+    Session-store key of a grown display specimen: its genome digest and a
+    digest of the exhibit constants it was grown under. Loading a collection
+    swaps both the population and the settings without going through the
+    sidebar's change check, so neither the id nor that check alone is enough.
+    """
+    settings = json.dumps(s, sort_keys=True, default=str)
+    return genotype.genome_digest(), hashlib.blake2b(settings.encode('utf-8'), digest_size=16).hexdigest()
 
-        /* === 2. CONTAINERS & LAYOUT === */
-            /* Glassmorphism Containers */
-            .block-container, [data-testid="stSidebar"], [data-testid="stExpander"], [data-testid="stTabs"] {
-                background: rgba(15, 25, 15, 0.75); /* Dark green-black tint */
-                backdrop-filter: blur(12px);
-                -webkit-backdrop-filter: blur(12px);
-                border-radius: 15px;
-                border: 1px solid rgba(67, 83, 52, 0.25); /* Subtle dark green/brown border */
-                box-shadow: 0 8px 32px 0 rgba(0, 0, 0, 0.37);
-            }
-            [data-testid="stSidebar"] {
-                border-right: 1px solid rgba(67, 83, 52, 0.35);
-            }
-            [data-testid="stExpander"] {
-                margin-bottom: 10px;
-                border-color: rgba(67, 83, 52, 0.2);
-            }
-            
-            /* Tab Buttons */
-            [data-baseweb="tab"] {
-                color: #9EB384 !important; /* Muted green text */
-                transition: all 0.3s ease;
-            }
-            [data-baseweb="tab"]:hover {
-                color: #FAF3E3 !important;
-                background-color: rgba(158, 179, 132, 0.1);
-            }
-            [data-baseweb="tab"][aria-selected="true"] { 
-                color: #FAF3E3 !important; 
-                background-color: rgba(67, 83, 52, 0.3);
-                border-bottom: 3px solid #9E7676 !important; /* Earthy Clay underline */
-            }
+def grow_display_specimen(genotype: Genotype, s: Dict) -> Tuple[ExhibitGrid, Phenotype]:
+    """
+    Grows a specimen on a fresh grid for display and keeps the result in
+    session_state, so reruns reuse the grown body instead of regrowing it
+    (which also kept re-rolling the grid and the specimen's displayed stats).
+    The display grid is seeded from the genotype id, so its terrain is stable.
+    Entries are keyed by display_specimen_key; the store is also cleared
+    whenever the exhibit constants change, to drop bodies no longer shown.
+    """
+    grown = st.session_state.setdefault('grown_specimens', {})
+    key = display_specimen_key(genotype, s)
+    if key not in grown:
+        if len(grown) >= GROWN_SPECIMEN_CACHE_SIZE:
+            grown.pop(next(iter(grown)))
+        vis_grid = ExhibitGrid(s, seed=zlib.crc32(genotype.id.encode()))
+        grown[key] = (vis_grid, Phenotype(genotype, vis_grid, s))
+    return grown[key]
+
+def display_specimen_mri(genotype: Genotype, s: Dict) -> go.Figure:
+    """
+    The MRI scan of a grown display specimen, built once and kept next to the
+    grown body. Reruns hand the same Figure (under the same chart key) back to
+    st.plotly_chart instead of rebuilding three width x height heatmaps.
+    Keyed and cleared together with the grown specimens.
+    """
+    scans = st.session_state.setdefault('specimen_mri_figures', {})
+    key = display_specimen_key(genotype, s)
+    if key not in scans:
+        if len(scans) >= GROWN_SPECIMEN_CACHE_SIZE:
+            scans.pop(next(iter(scans)))
+        vis_grid, phenotype = grow_display_specimen(genotype, s)
+        scans[key] = visualize_phenotype_mri(phenotype, vis_grid)
+    return scans[key]
+
+@st.fragment
+def render_dashboard_tab():
+    """Simulation Dashboard tab. Runs as a fragment, so its widgets rerun only this tab."""
+    if panel_toggle('dashboard', "📈 Render Exhibit Dashboard"):
+        st.header("Exhibit Trajectory Dashboard")
+        st.plotly_chart(
+            build_dashboard_figure(st.session_state.history, st.session_state.evolutionary_metrics),
+            width='stretch',
+            key="main_dashboard_plot_museum"
+        )
+        visualize_fitness_landscape(st.session_state.history)
 
-        /* === 3. TEXT & TITLES === */
-            /* Gradient Titles */
-            h1, h2, h3, h4, h5, h6 {
-                background: -webkit-linear-gradient(45deg, #435334, #9E7676, #FAF3E3); /* Dark Green -> Brown -> Off-White */
-                -webkit-background-clip: text;
-                -webkit-text-fill-color: transparent;
-                text-shadow: 0 0 8px rgba(250, 243, 227, 0.1);
-            }
-            /* Body Text */
-            p, div, span, li, label, .st-emotion-cache-16idsys p, [data-testid="stMarkdown"] {
-                color: #E2E8F0 !important; /* Light gray text */
-                text-shadow: 0 0 3px rgba(0, 0, 0, 0.5);
-            }
-            /* Links */
-            a { 
-                color: #9EB384 !important; 
-                text-decoration: none; 
-            }
-            a:hover { color: #FAF3E3 !important; text-decoration: underline; }
-
-        /* === 4. BUTTONS & WIDGETS (Earthy Overrides) === */
-            /* Secondary Buttons */
-            button[kind="secondary"], [data-testid="stDownloadButton"] > button {
-                border-radius: 10px;
-                border: 1px solid rgba(67, 83, 52, 0.7) !important;
-                background-color: rgba(67, 83, 52, 0.2) !important;
-                color: #9EB384 !important;
-                transition: all 0.3s ease;
-            }
-            button[kind="secondary"]:hover, [data-testid="stDownloadButton"] > button:hover {
-                background-color: rgba(67, 83, 52, 0.4) !important;
-                border-color: #9EB384 !important;
-                color: #FAF3E3 !important;
-                box-shadow: 0 0 15px rgba(158, 179, 132, 0.3) !important;
-            }
-            /* Primary Buttons */
-            button[kind="primary"] {
-                border-radius: 10px;
-                border: 1px solid #9EB384 !important;
-                background-color: #435334 !important; 
-                color: #FAF3E3 !important;
-            }
-            button[kind="primary"]:hover {
-                background-color: #9E7676 !important; /* Earthy clay on hover */
-                border-color: #FAF3E3 !important;
-                box-shadow: 0 0 15px rgba(158, 179, 132, 0.5) !important;
-            }
+    else:
+        st.info("This tab renders the main dashboard with large plots. It is paused to save memory.")
+
+@st.fragment
+def render_specimen_gallery_tab(history_df: pd.DataFrame, population: List[Genotype], s: Dict):
+    """Specimen Gallery tab. Runs as a fragment, so its widgets rerun only this tab."""
+    st.header("🔬 Specimen Gallery")
+    st.markdown("Observe the phenotypes (body plans) of the organisms that evolved. This is the **shape of life** your exhibit created.")
+
+    if panel_toggle('specimen_viewer', "🔬 Render Specimen Gallery"):
+        if population:
+            last_gen = int(history_df['generation'].max())
+            gen_to_view = st.slider("Select Epoch to View", 0, last_gen, last_gen)
+
+            gen_pop_df = history_df[history_df['generation'] == gen_to_view]
+            if gen_pop_df.empty:
+                st.warning(f"No data for epoch {gen_to_view}. Showing final epoch.")
+                gen_pop_df = history_df[history_df['generation'] == last_gen]
+
+            gen_pop_df = gen_pop_df.sort_values('fitness', ascending=False)
+
+            num_to_display = s.get('num_ranks_to_display', 3)
+
+            final_pop_sorted = sorted(population, key=lambda x: x.fitness, reverse=True)
+            top_specimens = final_pop_sorted[:num_to_display]
+            st.info(f"Showing top {num_to_display} specimens from the *final* population (Epoch {population[0].generation}).")
+
+            cols = st.columns(len(top_specimens))
+            for i, specimen in enumerate(top_specimens):
+                with cols[i], st.spinner(f"Scanning specimen {i+1}..."):
+                    vis_grid, phenotype = grow_display_specimen(specimen, s)
+
+                    st.markdown(f"**Rank {i+1} (Epoch {specimen.generation})**")
+                    st.metric("Fitness", f"{specimen.fitness:.4f}")
+
+                    # --- UPGRADE 1: Use the new MRI Scanner ---
+                    fig_mri = display_specimen_mri(specimen, s)
+                    st.plotly_chart(fig_mri, width='stretch', key=f"pheno_mri_{i}")
+
+                    st.markdown("##### **Component Ratios**")
+                    component_counts = Counter(cell.component.name for cell in phenotype.cells.values())
+                    if component_counts:
+                        fig_pie = build_component_pie(component_counts, specimen, hole=0.4)
+                        fig_pie.update_layout(showlegend=False, margin=FLUSH_MARGIN, height=150)
+                        st.plotly_chart(fig_pie, width='stretch', key=f"pheno_pie_{i}")
+
+                    # --- UPGRADE 2: Use the new Logic Circuit (Sankey) ---
+                    st.markdown("##### **Genetic Logic Circuit**")
+                    genome_key = specimen.genome_digest()
+                    fig_circuit = visualize_grn_sankey(genome_key, specimen)
+                    st.plotly_chart(fig_circuit, width='stretch', key=f"grn_circuit_{i}")
+
+                    st.markdown("##### **Evolved Objectives**")
+                    if specimen.objective_weights:
+                        obj_df = pd.DataFrame.from_dict(specimen.objective_weights, orient='index', columns=['Weight']).reset_index()
+                        obj_df = obj_df.rename(columns={'index': 'Objective'})
+                        fig_bar = px.bar(obj_df, x='Objective', y='Weight', color='Objective')
+                        fig_bar.update_layout(showlegend=False, margin=FLUSH_MARGIN, height=200)
+                        st.plotly_chart(fig_bar, width='stretch', key=f"pheno_bar_{i}")
+                    else:
+                        st.info("Global objectives are in use.")
 
-            /* Sliders: Track */
-            div[data-baseweb="slider"] > div > div > div:first-child {
-                background-color: #9E7676 !important; /* Earthy Clay */
-            }
-            /* Sliders: Handle */
-            div[role="slider"] {
-                background-color: #FAF3E3 !important; 
-                border: 2px solid #9E7676 !important; 
-                box-shadow: 0 0 5px rgba(0,0,0,0.5);
-            }
+                    G = build_grn_graph(genome_key, specimen)
+                    for label, heading, layout in GRN_VIEWS:
+                        st.markdown(f"##### **{heading}**")
+                        if not G.nodes:
+                            st.info("No GRN to display.")
+                            continue
+                        try:
+                            grn_png, note = render_grn_png(genome_key, layout, G)
+                        except ImportError as e:
+                            if layout not in GRAPHVIZ_PROGS:
+                                st.warning(f"Could not draw {label}: {e}")
+                                continue
+                            fallback = PYDOT_FALLBACK_LAYOUTS.get(layout)
+                            if fallback is None:
+                                st.warning(f"{label} Error: This layout requires 'pydot' (and Graphviz) to be installed. Skipping.")
+                                continue
+                            st.warning(f"{label} Error: This layout requires 'pydot' (and Graphviz) to be installed. Falling back to 'spring'.")
+                            try:
+                                grn_png, note = render_grn_png(genome_key, fallback, G)
+                            except Exception as e:
+                                st.warning(f"Could not draw {label} fallback: {e}")
+                                continue
+                        except Exception as e:
+                            st.warning(f"Could not draw {label}: {e}")
+                            continue
+                        if note:
+                            st.caption(f"{label}: {note}")
+                        st.image(grn_png)
 
-            /* Checkboxes */
-            div[data-baseweb="checkbox"] div[aria-checked="true"] {
-                background-color: #9E7676 !important;
-                border-color: #9E7676 !important;
-            }
+        else: # This is the case where `if population:` is false
+            st.warning("No population data available to view specimens. Run a simulation.")
 
-            /* Multiselect Tags */
-            span[data-baseweb="tag"] {
-                background-color: rgba(67, 83, 52, 0.9) !important;
-                border: 1px solid #9EB384 !important;
-                color: #FAF3E3 !important;
-            }
-            
-            /* Inputs Focus */
-            div[data-baseweb="input"]:focus-within, 
-            div[data-testid="stNumberInput"]:focus-within {
-                border-color: #9E7676 !important;
-                box-shadow: 0 0 0 0.2rem rgba(158, 118, 118, 0.25) !important;
-            }
+    else:
+        st.info("This tab grows and scans the top specimens. It is paused to save memory.")
 
-        /* === 5. ALERTS & MESSAGES (BANISHING THE BLUE) === */
-            
-            /* Info Box (The "Empty Exhibit" box) */
-            [data-testid="stInfo"] {
-                background-color: rgba(67, 83, 52, 0.3) !important; /* Deep Green background */
-                border: 1px solid #9EB384 !important;
-                color: #E2E8F0 !important;
-            }
-            /* Info Icon */
-            [data-testid="stInfo"] svg {
-                fill: #9EB384 !important; /* Green Icon */
-                color: #9EB384 !important;
-            }
-            
-            /* Success Box */
-            [data-testid="stSuccess"] {
-                background-color: rgba(158, 179, 132, 0.2) !important;
-                border: 1px solid #9EB384 !important;
-                color: #E2E8F0 !important;
-            }
-            
-            /* Warning Box */
-            [data-testid="stWarning"] {
-                background-color: rgba(158, 118, 118, 0.2) !important;
-                border: 1px solid #9E7676 !important;
-                color: #E2E8F0 !important;
-            }
-            [data-testid="stWarning"] svg {
-                fill: #9E7676 !important;
-                color: #9E7676 !important;
-            }
+@st.fragment
+def render_elite_analysis_tab(population: List[Genotype], s: Dict):
+    """Elite Lineage Analysis tab. Runs as a fragment, so its widgets rerun only this tab."""
+    st.header("🧬 Elite Lineage Analysis")
+    st.markdown("A deep dive into the 'DNA' of the most successful organisms. Each rank displays the best organism from a unique Kingdom, showcasing the diversity of life that has evolved.")
+    st.markdown("---")
 
-            /* Error Box */
-            [data-testid="stError"] {
-                background-color: rgba(100, 20, 20, 0.4) !important;
-                border: 1px solid #FF6B6B !important;
-                color: #E2E8F0 !important;
-            }
+    if panel_toggle('elite_analysis', "🧬 Render Elite Analysis"):
 
-        /* === 6. SCROLLBARS === */
-            ::-webkit-scrollbar { width: 8px; }
-            ::-webkit-scrollbar-track { background: rgba(15, 25, 15, 0.1); }
-            ::-webkit-scrollbar-thumb {
-                background-color: #435334; 
-                border-radius: 10px;
-            }
-            ::-webkit-scrollbar-thumb:hover { background-color: #9E7676; }
+        if population:
+            population.sort(key=lambda x: x.fitness, reverse=True)
+            num_ranks_to_display = s.get('num_ranks_to_display', 3)
 
-        </style>
-    """, unsafe_allow_html=True)
+            elite_specimens = []
+            seen_kingdoms = set()
+            for individual in population:
+                if individual.kingdom_id not in seen_kingdoms:
+                    elite_specimens.append(individual)
+                    seen_kingdoms.add(individual.kingdom_id)
 
+            for i, individual in enumerate(elite_specimens[:num_ranks_to_display]):
+                with st.expander(f"**Rank {i+1}:** Kingdom `{individual.kingdom_id}` | Fitness: `{individual.fitness:.4f}`", expanded=(i==0)):
 
-  
-    if 'password_attempts' not in st.session_state:
-        st.session_state.password_attempts = 0
-    if 'password_correct' not in st.session_state:
-        st.session_state.password_correct = False
-    # --- ADD THIS BLOCK ---
-    # Initialize state for lazy-loading tabs
-    if 'show_specimen_viewer' not in st.session_state:
-        st.session_state.show_specimen_viewer = False
-    if 'show_elite_analysis' not in st.session_state:
-        st.session_state.show_elite_analysis = False
-    if 'show_genesis_chronicle' not in st.session_state:
-        st.session_state.show_genesis_chronicle = False
-    if 'dashboard_visible' not in st.session_state:
-        st.session_state.dashboard_visible = False
-    if 'analytics_lab_visible' not in st.session_state:
-        st.session_state.analytics_lab_visible = False
+                    with st.spinner(f"Growing Rank {i+1}..."):
+                        vis_grid, phenotype = grow_display_specimen(individual, s)
+
+                    col1, col2 = st.columns([1, 1])
+                    with col1:
+                        st.markdown("##### **Core Metrics**")
+                        st.metric("Cell Count", f"{individual.cell_count}")
+                        st.metric("Complexity", f"{individual.compute_complexity():.2f}")
+                        st.metric("Lifespan", f"{individual.lifespan} epochs")
+                        st.metric("Energy Prod.", f"{individual.energy_production:.3f}")
+                        st.metric("Energy Cons.", f"{individual.energy_consumption:.3f}")
+
+                    with col2:
+                        st.markdown("##### **Phenotypic MRI Scan**")
+                        # Use the new MRI visualizer here too
+                        fig_mri = display_specimen_mri(individual, s)
+                        st.plotly_chart(fig_mri, width='stretch', key=f"elite_pheno_vis_{i}")
+
+                    st.markdown("---")
+
+                    col3, col4 = st.columns([1, 2]) # Give more space to the circuit diagram
+
+                    with col3:
+                        st.markdown("##### **Cellular Composition**")
+                        component_counts = Counter(cell.component.name for cell in phenotype.cells.values())
+                        if component_counts:
+                            fig_pie = build_component_pie(component_counts, individual)
+                            fig_pie.update_layout(showlegend=True, margin=FLUSH_MARGIN, height=300)
+                            st.plotly_chart(fig_pie, width='stretch', key=f"elite_pie_{i}")
+
+                    with col4:
+                        st.markdown("##### **Logic Flow (The 'Mind' of the Organism)**")
+                        # Use the new Sankey visualizer
+                        fig_circuit = visualize_grn_sankey(individual.genome_digest(), individual)
+                        st.plotly_chart(fig_circuit, width='stretch', key=f"elite_circuit_{i}")
+        else:
+            st.warning("No population data available to analyze.")
+
+    else:
+        st.info("This tab renders detailed organism data. It is paused to save memory.")
+
+@st.fragment
+def render_dynastic_histories(history_df: pd.DataFrame, sorted_breaks: List[int], sorted_events: List[Dict], event_generations: np.ndarray, s: Dict):
+    """
+    Dynastic Histories section of the Genesis Chronicle. A fragment of its own,
+    so picking another dynasty reruns only this section rather than the whole
+    tab (Hall of Innovation, epoch analysis, phylogeny and Pantheon).
+    """
+    st.markdown("---")
+    st.markdown("### 👑 Dynastic Histories")
+    st.markdown("Trace the complete story of the most influential lineages in your exhibit. Select a dynasty to view its rise, its peak, and its eventual fate.")
+
+    # Identify major lineages from apex predators of each epoch
+    major_lineages = {}
+    if len(sorted_breaks) > 1:
+        for i in range(len(sorted_breaks) - 1):
+            start_gen, end_gen = sorted_breaks[i], sorted_breaks[i+1]
+            epoch_df = history_df[(history_df['generation'] >= start_gen) & (history_df['generation'] <= end_gen)]
+            if not epoch_df.empty:
+                apex_organism_idx = epoch_df['fitness'].idxmax()
+                apex_organism = epoch_df.loc[apex_organism_idx]
+                lineage_id = apex_organism['lineage_id']
+                if lineage_id not in major_lineages:
+                    major_lineages[lineage_id] = f"Apex of Epoch {i+1} (Epoch {apex_organism['generation']})"
+
+    if not major_lineages:
+        st.info("No major dynasties have been identified yet. Run a longer simulation to establish dominant lineages.")
+    else:
+        lineage_options = list(major_lineages.keys())
+        selected_lineage_id = st.selectbox(
+            "Select a Dynasty to Investigate",
+            options=lineage_options,
+            format_func=lambda x: f"Lineage {x} ({major_lineages[x]})"
+        )
+
+        # Every listed dynasty is prepared in one pass, so switching between them is a lookup
+        universe_avg_df, dynasties = build_dynasty_records(
+            st.session_state.history, st.session_state.get('gene_archive', []), tuple(lineage_options)
+        )
+        dynasty = dynasties.get(selected_lineage_id)
+
+        if dynasty:
+            lineage_df = dynasty['lineage_df']
+
+            # --- 1. Summary Stats ---
+            founder = dynasty['founder']
+            peak = dynasty['peak']
+            survived_gens = lineage_df['generation'].nunique()
+
+            c1, c2, c3, c4 = st.columns(4)
+            c1.metric("Founded in Epoch", f"{founder['generation']}")
+            c2.metric("Founder's Kingdom", founder['kingdom_id'])
+            c3.metric("Peak Fitness", f"{peak['fitness']:.3f}")
+            c4.metric("Epochs of Dominance", f"{survived_gens}")
+
+            # --- 2. Performance Chart ---
+            fig_lineage = go.Figure(
+                data=[
+                    go.Scatter(x=lineage_df['generation'], y=lineage_df['fitness'], mode='lines', name=f'Lineage {selected_lineage_id} Fitness', line=dict(color='cyan', width=3)),
+                    go.Scatter(x=universe_avg_df['generation'], y=universe_avg_df['fitness'], mode='lines', name='Exhibit Avg. Fitness', line=dict(color='gray', dash='dot'))
+                ],
+                layout=dict(title=f"Fitness Trajectory of Dynasty {selected_lineage_id}", height=300, margin=TITLED_MARGIN)
+            )
+            st.plotly_chart(fig_lineage, width='stretch', key=f"dynasty_perf_{selected_lineage_id}")
+
+            # --- NEW: More Complex Details ---
+            sub_col1, sub_col2 = st.columns(2)
+
+            with sub_col1:
+                # --- Dynastic Event Log ---
+                st.markdown("##### Dynastic Event Log")
+                dynasty_events = sorted_events[genesis_event_window(event_generations, founder['generation'], lineage_df.iloc[-1]['generation'])]
+                if not dynasty_events:
+                    st.info("This dynasty's lifespan was uneventful.")
+                else:
+                    event_log_container = st.container(height=200)
+                    for event in dynasty_events:
+                        event_log_container.markdown(f"**Epoch {event['generation']}:** {event['icon']} {event['title']}")
+
+                # --- Legacy of Innovation ---
+                st.markdown("##### Legacy of Innovation")
+                innovations = [e for e in dynasty_events if 'Innovation' in e['type'] and e.get('lineage_id') == selected_lineage_id]
+                if not innovations:
+                    st.info("This dynasty was a follower, not an innovator.")
+                else:
+                    for innov in innovations:
+                        st.markdown(f"💡 Invented **{innov['title'].split(': ')[1]}** in Epoch {innov['generation']}.")
+
+            with sub_col2:
+                # --- Evolved Strategy Profile ---
+                st.markdown("##### Apex Strategy Profile (GRN Analysis)")
+                apex_specimen = dynasty['apex_specimen']
+                if apex_specimen:
+                    rule_actions = Counter(r.action_type for r in apex_specimen.rule_genes)
+                    action_df = pd.DataFrame.from_dict(rule_actions, orient='index', columns=['Count']).reset_index()
+                    fig_strategy = px.bar(action_df, x='index', y='Count', title="GRN Action Type Frequency", labels={'index': 'Action Type'})
+                    fig_strategy.update_layout(height=300, margin=TITLED_MARGIN)
+                    st.plotly_chart(fig_strategy, width='stretch', key=f"dynasty_strat_{selected_lineage_id}")
+
+            # --- 3. Gallery of Ancestors ---
+            st.markdown("##### Gallery of Ancestors")
+
+            ancestor_specimens = dynasty['ancestors']
+
+            if not ancestor_specimens:
+                st.warning("Could not retrieve ancestor data from the gene archive for this dynasty.")
+            else:
+                cols = st.columns(len(ancestor_specimens))
+                for i, (role, specimen) in enumerate(ancestor_specimens.items()):
+                    with cols[i]:
+                        st.markdown(f"**The {role}** (Epoch {specimen.generation})")
+                        st.metric("Fitness", f"{specimen.fitness:.4f}")
+                        with st.spinner(f"Growing {role}..."):
+                            vis_grid, phenotype = grow_display_specimen(specimen, s)
+                            fig = visualize_phenotype_2d(phenotype, vis_grid)
+                            fig.update_layout(**COMPACT_CARD_LAYOUT)
+                            st.plotly_chart(fig, width='stretch', key=f"dynasty_vis_{selected_lineage_id}_{i}")
+
+@st.fragment
+def render_genesis_chronicle_tab(history_df: pd.DataFrame, population: List[Genotype], s: Dict):
+    """Genesis Chronicle tab. Runs as a fragment, so its widgets rerun only this tab."""
+    st.header("📜 The Chronicle of Genesis")
+    st.markdown("This is the historical record of your exhibit, chronicling the pivotal moments of creation, innovation, and environmental change. These events are the sparks that drive 'truly infinite' evolution.")
+
+    if panel_toggle('genesis_chronicle', "📜 Render Genesis Chronicle"):
+        events = st.session_state.get('genesis_events', [])
+        if not events:
+            st.info("No significant evolutionary events have been recorded yet. Run a simulation with innovation and cataclysms enabled.")
+        else:
+            st.markdown("---")
+            sorted_events, event_generations, event_type_array = index_genesis_events(events)
+            event_types = np.unique(event_type_array).tolist()
+            last_gen = int(history_df['generation'].max())
+
+            col1, col2 = st.columns([1, 3])
+            with col1:
+                st.markdown("#### Filter Events")
+                # A form batches the filters: dragging the epoch slider no longer reruns
+                # the whole Chronicle on every tick, only when the filters are applied.
+                with st.form("genesis_filter_form", border=False):
+                    gen_range = st.slider(
+                        "Filter by Epoch",
+                        min_value=0,
+                        max_value=last_gen,
+                        value=(0, last_gen)
+                    )
+                    selected_types = st.multiselect(
+                        "Filter by Event Type",
+                        options=event_types,
+                        default=event_types
+                    )
+                    st.form_submit_button("Apply Filters", width='stretch')
+
+            epoch_window = genesis_event_window(event_generations, gen_range[0], gen_range[1])
+            type_mask = np.isin(event_type_array[epoch_window], selected_types)
+            filtered_events = [sorted_events[epoch_window.start + idx] for idx in np.flatnonzero(type_mask)]
+
+            with col2:
+                st.markdown(f"#### Recorded History ({len(filtered_events)} events)")
+                log_container = st.container(height=400)
+                # One markdown element for the whole log instead of one per event
+                log_container.markdown(
+                    "\n".join(GENESIS_EVENT_HTML.format(**event) for event in filtered_events),
+                    unsafe_allow_html=True
+                )
+
+            st.markdown("---")
+            st.markdown("### 💡 Hall of Innovation")
+            st.markdown("A showcase of the most novel organisms that emerged directly after key evolutionary leaps.")
+
+            innovation_events = [e for e in filtered_events if e['type'] in INNOVATION_EVENT_TYPES]
+            if not innovation_events:
+                st.info("No innovation events found in the selected range.")
+            else:
+                gallery_specimens = []
+                generations_to_check = sorted(list(set(e['generation'] + 1 for e in innovation_events)))
+
+                lineage_lookup = {p.lineage_id: p for p in population}
+
+                for event in innovation_events:
+                    next_gen = event['generation'] + 1
+                    next_gen_df = history_df[history_df['generation'] == next_gen]
+                    if not next_gen_df.empty:
+                        best_in_gen_idx = next_gen_df['fitness'].idxmax()
+                        best_organism_info = next_gen_df.loc[best_in_gen_idx]
+                        best_lineage_id = best_organism_info['lineage_id']
+
+                        specimen = lineage_lookup.get(best_lineage_id)
+
+                        if specimen and not any(s['specimen'].id == specimen.id for s in gallery_specimens):
+                            gallery_specimens.append({
+                                'specimen': specimen,
+                                'innovation_title': event['title'],
+                                'innovation_gen': next_gen 
+                            })
+
+                if not gallery_specimens:
+                    st.warning("Could not find representative specimens for the selected innovations.")
+                else:
+                    for i, item in enumerate(gallery_specimens[:3]):
+                        specimen = item['specimen']
+                        st.markdown(f"#### 🏅 Specimen from Epoch {item['innovation_gen']} (Post-'*{item['innovation_title']}*')")
+
+                        with st.spinner(f"Growing and analyzing specimen {i+1}..."):
+                                vis_grid, phenotype = grow_display_specimen(specimen, s)
+
+                        col1, col2, col3 = st.columns(3)
+
+                        with col1:
+                            st.markdown("**Phenotype (Body Plan)**")
+                            fig_pheno = visualize_phenotype_2d(phenotype, vis_grid)
+                            fig_pheno.update_layout(**COMPACT_CARD_LAYOUT)
+                            st.plotly_chart(fig_pheno, width='stretch', key=f"gallery_pheno_{i}")
+
+                            st.markdown("**Component Composition**")
+                            component_counts = Counter(cell.component.name for cell in phenotype.cells.values())
+                            if component_counts:
+                                fig_pie = build_component_pie(component_counts, specimen)
+                                fig_pie.update_layout(showlegend=False, margin=FLUSH_MARGIN, height=200)
+                                st.plotly_chart(fig_pie, width='stretch', key=f"gallery_pyie_{i}")
+                        with col2:
+                            st.markdown("**Internal Energy Distribution**")
+                            x0, y0, box_w, box_h = phenotype_extent(phenotype, vis_grid)
+                            box_rows, box_cols = np.arange(x0, x0 + box_w), np.arange(y0, y0 + box_h)
+                            cell_rows, cell_cols = phenotype_cell_index(phenotype, x0, y0)
+                            energy_data = np.full((box_w, box_h), np.nan)
+                            energy_data[cell_rows, cell_cols] = [cell.energy for cell in phenotype.cells.values()]
+                            fig_energy = px.imshow(energy_data, x=box_cols, y=box_rows, color_continuous_scale='viridis', aspect='equal')
+                            fig_energy.update_layout(**COMPACT_CARD_LAYOUT, coloraxis_showscale=False)
+                            fig_energy.update_xaxes(showticklabels=False).update_yaxes(showticklabels=False)
+                            st.plotly_chart(fig_energy, width='stretch', key=f"gallery_energye_{i}")
+
+                        with col3:
+                            st.markdown("**Cellular Age Map**")
+                            age_data = np.full((box_w, box_h), np.nan)
+                            age_data[cell_rows, cell_cols] = [cell.age for cell in phenotype.cells.values()]
+                            fig_age = px.imshow(age_data, x=box_cols, y=box_rows, color_continuous_scale='plasma', aspect='equal')
+                            fig_age.update_layout(**COMPACT_CARD_LAYOUT, coloraxis_showscale=False)
+                            fig_age.update_xaxes(showticklabels=False).update_yaxes(showticklabels=False)
+                            st.plotly_chart(fig_age, width='stretch', key=f"galleriey_age_{i}")
+                        st.markdown("---")
+
+            # --- NEW: Epochs & Phylogeny Section ---
+            st.markdown("---") # Separator
+            st.markdown("### ⏳ Epochs & Phylogeny")
+            st.markdown("A macro-level analysis of your exhibit's history, identifying distinct eras and visualizing the evolutionary tree of its kingdoms.")
+
+            col1, col2 = st.columns([2, 1])
+
+            with col1:
+                st.markdown("#### The Great Epochs of History")
+                # Identify break points for epochs
+                break_points = {0, last_gen}
+                major_events = [e for e in events if e['type'] in EPOCH_BREAK_EVENT_TYPES]
+                for event in major_events:
+                    break_points.add(event['generation'])
+
+                sorted_breaks = sorted(list(break_points))
+
+                if len(sorted_breaks) < 2:
+                    st.info("Not enough major events have occurred to define distinct historical epochs.")
+                else:
+                    for i in range(len(sorted_breaks) - 1):
+                        start_gen = sorted_breaks[i]
+                        end_gen = sorted_breaks[i+1]
+
+                        epoch_df = history_df[(history_df['generation'] >= start_gen) & (history_df['generation'] <= end_gen)]
+                        if epoch_df.empty: continue
+
+                        # Determine epoch name from the event that started it
+                        start_event = next((e for e in major_events if e['generation'] == start_gen), None)
+                        epoch_name = f"Epoch {i+1}"
+                        if i == 0 and not start_event: epoch_name = "The Primordial Era"
+                        elif start_event: epoch_name = f"The {start_event['title']} Era"
+
+                        with st.expander(f"**{epoch_name}** (Epochs {start_gen} - {end_gen})"):
+                            # --- NEW: More complex and shocking details ---
+                            c1, c2, c3 = st.columns(3)
+
+                            # 1. Core Metrics
+                            with c1:
+                                st.markdown("##### Core Metrics")
+                                kingdom_modes = epoch_df['kingdom_id'].mode()
+                                dominant_kingdom = kingdom_modes.iloc[0] if not kingdom_modes.empty else "N/A"
+                                mean_fitness = epoch_df['fitness'].mean()
+                                peak_complexity = epoch_df['complexity'].max()
+                                st.metric("Dominant Kingdom", dominant_kingdom)
+                                st.metric("Mean Fitness", f"{mean_fitness:.3f}")
+                                st.metric("Peak Complexity", f"{peak_complexity:.2f}")
+
+                            # 2. Evolutionary Dynamics
+                            with c2:
+                                st.markdown("##### Dynamics")
+                                start_fitness = history_df[history_df['generation'] == start_gen]['fitness'].mean()
+                                end_fitness = history_df[history_df['generation'] == end_gen]['fitness'].mean()
+                                velocity = (end_fitness - start_fitness) / max(1, end_gen - start_gen)
+                                st.metric("Evolutionary Velocity", f"{velocity*100:.2f} ΔF/100epochs")
+
+                                apex_organism_idx = epoch_df['fitness'].idxmax()
+                                apex_organism = epoch_df.loc[apex_organism_idx]
+                                st.markdown(f"**Apex Predator:** A `{apex_organism['kingdom_id']}` organism reached a peak fitness of **{apex_organism['fitness']:.3f}** with complexity **{apex_organism['complexity']:.1f}**.")
+
+                            # 3. Innovations and Extinctions
+                            with c3:
+                                st.markdown("##### Historical Events")
+                                epoch_events = sorted_events[genesis_event_window(event_generations, start_gen, end_gen - 1)]
+                                innovations = [e['title'] for e in epoch_events if 'Innovation' in e['type']]
+                                if innovations:
+                                    st.markdown("**Key Innovations:**")
+                                    for innov in innovations[:3]:
+                                        st.markdown(f"- `{innov.replace('New Component: ', '').replace('New Sense: ', '')}`")
+
+                                kingdoms_at_start = set(history_df[history_df['generation'] == start_gen]['kingdom_id'].unique())
+                                kingdoms_at_end = set(history_df[history_df['generation'] == end_gen]['kingdom_id'].unique())
+                                extinct_kingdoms = kingdoms_at_start - kingdoms_at_end
+                                if extinct_kingdoms:
+                                    st.markdown("**Extinctions:**")
+                                    for kingdom in extinct_kingdoms:
+                                        st.markdown(f"- The **{kingdom}** kingdom perished.")
+
+            with col2:
+                st.markdown("#### The Tree of Life (Phylogeny)")
+                layout_engine = st.selectbox("Layout engine", PHYLOGENY_LAYOUT_ENGINES, index=0, key="phylogeny_layout_engine")
+                phylogeny_dot = build_phylogeny_dot(st.session_state.history, layout_engine)
+
+                if phylogeny_dot is None:
+                    st.info("No kingdom data to build a tree of life.")
+                else:
+                    try:
+                        phylogeny_svg = render_phylogeny_svg(st.session_state.history, layout_engine)
+                    except GRAPHVIZ_RENDER_ERRORS:
+                        st.graphviz_chart(phylogeny_dot)
+                    else:
+                        st.html(f'<div style="text-align: center;">{phylogeny_svg}</div>')
+
+            # --- NEW: Dynastic Histories Section ---
+            render_dynastic_histories(history_df, sorted_breaks, sorted_events, event_generations, s)
+
+            # --- NEW: Pantheon of Genes Section ---
+            st.markdown("---")
+            st.markdown("### 🔬 The Pantheon of Life")
+            st.markdown("A hall of fame for the most impactful genetic 'ideas' of your exhibit. This analyzes the entire fossil record to identify the components and rule strategies that defined success.")
+
+            gene_archive = st.session_state.get('gene_archive', [])
+            if not gene_archive:
+                st.info("The gene archive is empty. Run a simulation to populate the fossil record.")
+            else:
+                pantheon_col1, pantheon_col2 = st.columns(2)
+
+                with pantheon_col1:
+                    st.markdown("#### The Pantheon of Components")
+
+                    # The fossil-record scan, scoring and prevalence figures are cached per
+                    # (archive, population), so revisiting the Chronicle just redraws them
+                    for i, comp_data in enumerate(build_pantheon_of_components(gene_archive, population, last_gen)):
+                        comp_gene = comp_data['gene']
+                        with st.expander(f"**{i+1}. {comp_gene.name}** (Score: {comp_data['score']:.0f})", expanded=(i<2)):
+                            st.markdown(f"Invented in **Epoch {comp_data['first_gen']}** by Dynasty `{comp_data['inventor_lineage']}`")
+                            st.code(f"[{comp_gene.color}] Base: {comp_gene.base_kingdom}, Mass: {comp_gene.mass:.2f}, Struct: {comp_gene.structural:.2f}, E.Store: {comp_gene.energy_storage:.2f}", language="text")
+                            st.plotly_chart(comp_data['prevalence_figure'], width='stretch', key=f"pantheon_prevalence_{comp_gene.id}")
+
+                with pantheon_col2:
+                    st.markdown("#### The Lawgivers: Elite Genetic Strategies")
+
+                    # Find elite specimens
+                    elites = []
+                    if population:
+                        sorted_pop = sorted(population, key=lambda x: x.fitness, reverse=True)
+                        seen_kingdoms = set()
+                        for org in sorted_pop:
+                            if org.kingdom_id not in seen_kingdoms:
+                                elites.append(org)
+                                seen_kingdoms.add(org.kingdom_id)
+
+                    if not elites:
+                        st.info("No elite organisms found to analyze.")
+                    else:
+                        fig_actions, fig_conds = build_elite_strategy_figures(tuple(e.id for e in elites), elites)
+                        st.plotly_chart(fig_actions, width='stretch', key="pantheon_elite_actions")
+                        st.plotly_chart(fig_conds, width='stretch', key="pantheon_elite_conditions")
+
+    else:
+        st.info("This tab reconstructs the exhibit's history and regrows key specimens. It is paused to save memory.")
+
+@st.fragment
+def render_analytics_lab_tab(s: Dict):
+    """Custom Analytics Lab tab. Runs as a fragment, so its widgets rerun only this tab."""
+    if panel_toggle('analytics_lab', "📊 Render Custom Analytics Lab"):
+        st.header("📊 Custom Analytics Lab")
+        st.markdown("A flexible laboratory for generating custom 2D plots to explore relationships within your exhibit's history. Configure the number of plots in the Curator's Console.")
+        st.markdown("---")
+
+        num_plots = min(s.get('num_custom_plots', 4), len(ANALYTICS_LAB_PLOTS))
+
+        cols = st.columns(2)
+        for i in range(num_plots):
+            with cols[i % 2]:
+                fig = build_analytics_lab_figure(i, st.session_state.history)
+                st.plotly_chart(fig, width='stretch', key=f"custom_plotly_chart_{i}")
+
+    else:
+        st.info("This tab renders custom plots. It is paused to save memory.")
+
+# ========================================================
+#
+# PART 7: THE STREAMLIT APP (THE "CURATOR'S CONSOLE")
+#
+# ========================================================
+
+# --- MASTER TERRA THEME CSS (FINAL) ---
+TERRA_THEME_CSS = """
+    <style>
     
+    /* === 1. CORE APP & HEADER === */
+        /* Transparent Header */
+        header[data-testid="stHeader"] {
+            background: transparent;
+        }
+        /* Hide Header Decoration Line */
+        [data-testid="stDecoration"] {
+            display: none;
+        }
+        /* Main App Background */
+        .stApp {
+            background-color: #0D1117; /* Near-black */
+            background-image: url("data:image/svg+xml,%3Csvg xmlns='http://www.w3.org/2000/svg' width='40' height='40' viewBox='0 0 40 40'%3E%3Cg fill-rule='evenodd'%3E%3Cg fill='%231A202C' fill-opacity='0.4'%3E%3Cpath d='M0 38.59l2.83-2.83 1.41 1.41L1.41 40H0v-1.41zM0 1.4l2.83 2.83 1.41-1.41L1.41 0H0v1.41zM38.59 40l-2.83-2.83 1.41-1.41L40 38.59V40h-1.41zM40 1.41l-2.83 2.83-1.41-1.41L38.59 0H40v1.41zM20 18.6l2.83-2.83 1.41 1.41L21.41 20l2.83 2.83-1.41 1.41L20 21.41l-2.83 2.83-1.41-1.41L18.59 20l-2.83-2.83 1.41-1.41L20 18.59z'/%3E%3C/g%3E%3C/g%3E%3C/svg%3E");
+            background-size: cover;
+            background-attachment: fixed;
+        }
+
+    /* === 2. CONTAINERS & LAYOUT === */
+        /* Glassmorphism Containers */
+        .block-container, [data-testid="stSidebar"], [data-testid="stExpander"], [data-testid="stTabs"] {
+            background: rgba(15, 25, 15, 0.75); /* Dark green-black tint */
+            backdrop-filter: blur(12px);
+            -webkit-backdrop-filter: blur(12px);
+            border-radius: 15px;
+            border: 1px solid rgba(67, 83, 52, 0.25); /* Subtle dark green/brown border */
+            box-shadow: 0 8px 32px 0 rgba(0, 0, 0, 0.37);
+        }
+        [data-testid="stSidebar"] {
+            border-right: 1px solid rgba(67, 83, 52, 0.35);
+        }
+        [data-testid="stExpander"] {
+            margin-bottom: 10px;
+            border-color: rgba(67, 83, 52, 0.2);
+        }
+        
+        /* Tab Buttons */
+        [data-baseweb="tab"] {
+            color: #9EB384 !important; /* Muted green text */
+            transition: all 0.3s ease;
+        }
+        [data-baseweb="tab"]:hover {
+            color: #FAF3E3 !important;
+            background-color: rgba(158, 179, 132, 0.1);
+        }
+        [data-baseweb="tab"][aria-selected="true"] { 
+            color: #FAF3E3 !important; 
+            background-color: rgba(67, 83, 52, 0.3);
+            border-bottom: 3px solid #9E7676 !important; /* Earthy Clay underline */
+        }
+
+    /* === 3. TEXT & TITLES === */
+        /* Gradient Titles */
+        h1, h2, h3, h4, h5, h6 {
+            background: -webkit-linear-gradient(45deg, #435334, #9E7676, #FAF3E3); /* Dark Green -> Brown -> Off-White */
+            -webkit-background-clip: text;
+            -webkit-text-fill-color: transparent;
+            text-shadow: 0 0 8px rgba(250, 243, 227, 0.1);
+        }
+        /* Body Text */
+        p, div, span, li, label, .st-emotion-cache-16idsys p, [data-testid="stMarkdown"] {
+            color: #E2E8F0 !important; /* Light gray text */
+            text-shadow: 0 0 3px rgba(0, 0, 0, 0.5);
+        }
+        /* Links */
+        a { 
+            color: #9EB384 !important; 
+            text-decoration: none; 
+        }
+        a:hover { color: #FAF3E3 !important; text-decoration: underline; }
+
+    /* === 4. BUTTONS & WIDGETS (Earthy Overrides) === */
+        /* Secondary Buttons */
+        button[kind="secondary"], [data-testid="stDownloadButton"] > button {
+            border-radius: 10px;
+            border: 1px solid rgba(67, 83, 52, 0.7) !important;
+            background-color: rgba(67, 83, 52, 0.2) !important;
+            color: #9EB384 !important;
+            transition: all 0.3s ease;
+        }
+        button[kind="secondary"]:hover, [data-testid="stDownloadButton"] > button:hover {
+            background-color: rgba(67, 83, 52, 0.4) !important;
+            border-color: #9EB384 !important;
+            color: #FAF3E3 !important;
+            box-shadow: 0 0 15px rgba(158, 179, 132, 0.3) !important;
+        }
+        /* Primary Buttons */
+        button[kind="primary"] {
+            border-radius: 10px;
+            border: 1px solid #9EB384 !important;
+            background-color: #435334 !important; 
+            color: #FAF3E3 !important;
+        }
+        button[kind="primary"]:hover {
+            background-color: #9E7676 !important; /* Earthy clay on hover */
+            border-color: #FAF3E3 !important;
+            box-shadow: 0 0 15px rgba(158, 179, 132, 0.5) !important;
+        }
+
+        /* Sliders: Track */
+        div[data-baseweb="slider"] > div > div > div:first-child {
+            background-color: #9E7676 !important; /* Earthy Clay */
+        }
+        /* Sliders: Handle */
+        div[role="slider"] {
+            background-color: #FAF3E3 !important; 
+            border: 2px solid #9E7676 !important; 
+            box-shadow: 0 0 5px rgba(0,0,0,0.5);
+        }
+
+        /* Checkboxes */
+        div[data-baseweb="checkbox"] div[aria-checked="true"] {
+            background-color: #9E7676 !important;
+            border-color: #9E7676 !important;
+        }
+
+        /* Multiselect Tags */
+        span[data-baseweb="tag"] {
+            background-color: rgba(67, 83, 52, 0.9) !important;
+            border: 1px solid #9EB384 !important;
+            color: #FAF3E3 !important;
+        }
+        
+        /* Inputs Focus */
+        div[data-baseweb="input"]:focus-within, 
+        div[data-testid="stNumberInput"]:focus-within {
+            border-color: #9E7676 !important;
+            box-shadow: 0 0 0 0.2rem rgba(158, 118, 118, 0.25) !important;
+        }
+
+    /* === 5. ALERTS & MESSAGES (BANISHING THE BLUE) === */
+        
+        /* Info Box (The "Empty Exhibit" box) */
+        [data-testid="stInfo"] {
+            background-color: rgba(67, 83, 52, 0.3) !important; /* Deep Green background */
+            border: 1px solid #9EB384 !important;
+            color: #E2E8F0 !important;
+        }
+        /* Info Icon */
+        [data-testid="stInfo"] svg {
+            fill: #9EB384 !important; /* Green Icon */
+            color: #9EB384 !important;
+        }
+        
+        /* Success Box */
+        [data-testid="stSuccess"] {
+            background-color: rgba(158, 179, 132, 0.2) !important;
+            border: 1px solid #9EB384 !important;
+            color: #E2E8F0 !important;
+        }
+        
+        /* Warning Box */
+        [data-testid="stWarning"] {
+            background-color: rgba(158, 118, 118, 0.2) !important;
+            border: 1px solid #9E7676 !important;
+            color: #E2E8F0 !important;
+        }
+        [data-testid="stWarning"] svg {
+            fill: #9E7676 !important;
+            color: #9E7676 !important;
+        }
+
+        /* Error Box */
+        [data-testid="stError"] {
+            background-color: rgba(100, 20, 20, 0.4) !important;
+            border: 1px solid #FF6B6B !important;
+            color: #E2E8F0 !important;
+        }
+
+    /* === 6. SCROLLBARS === */
+        ::-webkit-scrollbar { width: 8px; }
+        ::-webkit-scrollbar-track { background: rgba(15, 25, 15, 0.1); }
+        ::-webkit-scrollbar-thumb {
+            background-color: #435334; 
+            border-radius: 10px;
+        }
+        ::-webkit-scrollbar-thumb:hover { background-color: #9E7676; }
+
+    </style>
+"""
+
+def minify_css(css: str) -> str:
+    """Strips comments and collapses whitespace in a <style> block."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{};,])\s*", r"\1", css).strip()
+
+# Built once at import; this is what is sent over the websocket on every rerun
+TERRA_THEME_CSS_MIN = minify_css(TERRA_THEME_CSS)
+
+# --- Per-session UI state, initialized once at the top of every run ---
+SESSION_UI_DEFAULTS = {
+    'password_attempts': 0,
+    'password_correct': False,
+}
+
+# --- Senses every exhibit starts with; innovation appends to a per-session copy ---
+BASE_CONDITION_SOURCES = (
+    'self_energy', 'self_age', 'env_light', 'env_minerals', 'env_temp',
+    'neighbor_count_empty', 'neighbor_count_self', 'neighbor_count_other',
+    'self_type'
+)
+
+@dataclass
+class RedQueenParasite:
+    """A simple co-evolving digital parasite for the Red Queen dynamic."""
+    target_kingdom_id: str = "Carbon"
+
+def main():
+    st.set_page_config(
+        page_title="LIFE BEYOND II: The Museum of Alien Life",
+        layout="wide",
+        page_icon="🏛️",
+        initial_sidebar_state="expanded"
+    )
+
+    # --- DARK GREEN/BROWN/WHITE "TERRA" THEME ---
+    # Re-emitted on every run on purpose: Streamlit drops any element a rerun doesn't
+    # produce again, so a cached/one-shot injection would lose the theme after the
+    # first interaction. What we can save is bytes: the minified copy is built once.
+    st.markdown(TERRA_THEME_CSS_MIN, unsafe_allow_html=True)
+
+    for key, default in SESSION_UI_DEFAULTS.items():
+        st.session_state.setdefault(key, default)
+
     # --- Password Protection ---
     # --- Password Protection (Updated) ---
     def check_password_on_change():
@@ -2555,11 +3765,7 @@ def main():
         st.session_state.current_population = None
         st.session_state.exhibit_presets = {doc['name']: doc for doc in exhibit_presets_table.all()}
         
-        st.session_state.evolvable_condition_sources = [
-            'self_energy', 'self_age', 'env_light', 'env_minerals', 'env_temp',
-            'neighbor_count_empty', 'neighbor_count_self', 'neighbor_count_other',
-            'self_type'
-        ]
+        st.session_state.evolvable_condition_sources = list(BASE_CONDITION_SOURCES)
         
         if 'genesis_events' not in st.session_state:
             st.session_state.genesis_events = []
@@ -2568,17 +3774,13 @@ def main():
 
     # --- Robustness checks for all required keys on *every* run ---
     if 'settings' not in st.session_state: st.session_state.settings = settings_table.get(doc_id=1) or {}
-    if 'history' not in st.session_state: st.session_state.history = []
-    if 'evolutionary_metrics' not in st.session_state: st.session_state.evolutionary_metrics = []
-    if 'current_population' not in st.session_state: st.session_state.current_population = None
+    st.session_state.setdefault('history', [])
+    st.session_state.setdefault('evolutionary_metrics', [])
+    st.session_state.setdefault('current_population', None)
     if 'exhibit_presets' not in st.session_state: st.session_state.exhibit_presets = {doc['name']: doc for doc in exhibit_presets_table.all()}
     if 'evolvable_condition_sources' not in st.session_state:
-        st.session_state.evolvable_condition_sources = [
-            'self_energy', 'self_age', 'env_light', 'env_minerals', 'env_temp',
-            'neighbor_count_empty', 'neighbor_count_self', 'neighbor_count_other',
-            'self_type'
-        ]
-    if 'genesis_events' not in st.session_state: st.session_state.genesis_events = []
+        st.session_state.evolvable_condition_sources = list(BASE_CONDITION_SOURCES)
+    st.session_state.setdefault('genesis_events', [])
 
 
     # ===============================================
@@ -2590,116 +3792,123 @@ def main():
     
     s = copy.deepcopy(st.session_state.settings)
 
-    if st.sidebar.button("Reset Curator's Console to Defaults", width='stretch', key="reset_defaults_button"):
+    # --- Reset and Decommission run as on_click callbacks: the state change lands ---
+    # --- before the click's own rerun, so no sleep + st.rerun() second pass is needed ---
+    def reset_console_to_defaults():
         st.session_state.settings = {}
         st.toast("Curator's Console reset to defaults!", icon="📡")
-        time.sleep(1)
-        st.rerun()
 
-    if st.sidebar.button("Decommission Exhibit & Restart", width='stretch', key="clear_state_button"):
+    def decommission_exhibit():
         db.truncate()
         st.session_state.clear()
         st.toast("Cleared all archived data. The exhibit has been reset.", icon="💥")
-        time.sleep(1)
-        st.rerun()
+
+    st.sidebar.button("Reset Curator's Console to Defaults", width='stretch', key="reset_defaults_button", on_click=reset_console_to_defaults)
+    st.sidebar.button("Decommission Exhibit & Restart", width='stretch', key="clear_state_button", on_click=decommission_exhibit)
         
     with st.sidebar.expander("🔭 Exhibit Hall Manager (Your Curated Collections)", expanded=True):
         presets = st.session_state.exhibit_presets
         preset_names = ["<Select a Collection to Load>"] + list(presets.keys())
         
+        # --- Archiving runs as an on_click callback, before the script reruns, ---
+        # --- so the new collection shows up in the selector without a second rerun ---
+        def archive_current_exhibit():
+            new_preset_name = st.session_state.get('new_preset_name', '')
+            if not new_preset_name:
+                st.toast("Please enter a name for your collection.", icon="⚠️")
+                return
+
+            current_settings_snapshot = s 
+            current_history = st.session_state.get('history', [])
+            current_metrics = st.session_state.get('evolutionary_metrics', [])
+            
+            current_pop_data = []
+            if st.session_state.get('current_population'):
+                try:
+                    current_pop_data = [asdict(g) for g in st.session_state.current_population]
+                except Exception as e:
+                    st.toast(f"Could not serialize population: {e}", icon="⚠️")
+
+            preset_data_to_save = {
+                'name': new_preset_name,
+                'settings': current_settings_snapshot,
+                'history': current_history,
+                'evolutionary_metrics': current_metrics,
+                'genesis_events': st.session_state.get('genesis_events', []),
+                'final_population_genotypes': current_pop_data
+            }
+            
+            st.session_state.exhibit_presets[new_preset_name] = preset_data_to_save
+            exhibit_presets_table.upsert(preset_data_to_save, Query().name == new_preset_name)
+            st.toast(f"Collection '{new_preset_name}' (with results) archived!", icon="📦")
+
         c1, c2 = st.columns(2)
         with c1:
-            new_preset_name = st.text_input("New Collection Name", placeholder="e.g., 'Titan Methane Seas'")
+            st.text_input("New Collection Name", placeholder="e.g., 'Titan Methane Seas'", key="new_preset_name")
         with c2:
             st.write(" ") # Spacer
-            if st.button("📦 Archive Current Exhibit", width='stretch'):
-                if new_preset_name:
-                    current_settings_snapshot = s 
-                    current_history = st.session_state.get('history', [])
-                    current_metrics = st.session_state.get('evolutionary_metrics', [])
-                    
-                    current_pop_data = []
-                    if st.session_state.get('current_population'):
-                        try:
-                            current_pop_data = [asdict(g) for g in st.session_state.current_population]
-                        except Exception as e:
-                            st.warning(f"Could not serialize population: {e}")
-
-                    preset_data_to_save = {
-                        'name': new_preset_name,
-                        'settings': current_settings_snapshot,
-                        'history': current_history,
-                        'evolutionary_metrics': current_metrics,
-                        'genesis_events': st.session_state.get('genesis_events', []),
-                        'final_population_genotypes': current_pop_data
-                    }
-                    
-                    presets[new_preset_name] = preset_data_to_save
-                    exhibit_presets_table.upsert(preset_data_to_save, Query().name == new_preset_name)
+            st.button("📦 Archive Current Exhibit", width='stretch', on_click=archive_current_exhibit)
+
+        # --- Load and Delete are on_click callbacks too: the collection state is ---
+        # --- swapped before the click's rerun, so no st.rerun() second pass ---
+        def load_collection(preset_name: str):
+            preset_to_load = st.session_state.exhibit_presets[preset_name]
+            
+            loaded_settings = copy.deepcopy(preset_to_load['settings'])
+            st.session_state.settings = loaded_settings
+            
+            if settings_table.get(doc_id=1):
+                settings_table.update(loaded_settings, doc_ids=[1])
+            else:
+                settings_table.insert(loaded_settings)
+                
+            st.session_state.history = preset_to_load.get('history', [])
+            st.session_state.evolutionary_metrics = preset_to_load.get('evolutionary_metrics', [])
+            st.session_state.genesis_events = preset_to_load.get('genesis_events', [])
+            
+            pop_data = preset_to_load.get('final_population_genotypes', [])
+            loaded_population = []
+            if pop_data:
+                try:
+                    for geno_dict in pop_data:
+                        comp_genes_dict = geno_dict.get('component_genes', {})
+                        re_comp_genes = {}
+                        for comp_id, comp_dict in comp_genes_dict.items():
+                            re_comp_genes[comp_id] = ComponentGene(**comp_dict)
+                        geno_dict['component_genes'] = re_comp_genes
+                        
+                        rule_genes_list = geno_dict.get('rule_genes', [])
+                        re_rule_genes = [RuleGene(**rule_dict) for rule_dict in rule_genes_list]
+                        geno_dict['rule_genes'] = re_rule_genes
+                        
+                        loaded_population.append(Genotype(**geno_dict))
+                except Exception as e:
+                    st.error(f"Error de-serializing population: {e}")
                     
-                    st.toast(f"Collection '{new_preset_name}' (with results) archived!", icon="📦")
-                    st.session_state.exhibit_presets = presets
-                    st.rerun()
-                else:
-                    st.warning("Please enter a name for your collection.")
+            st.session_state.current_population = loaded_population
+            
+            results_to_save = {
+                'history': st.session_state.history,
+                'evolutionary_metrics': st.session_state.evolutionary_metrics,
+            }
+            if results_table.get(doc_id=1):
+                results_table.update(results_to_save, doc_ids=[1])
+            else:
+                results_table.insert(results_to_save)
+
+            st.toast(f"Loaded collection '{preset_name}' (with results)!", icon="🌠")
+
+        def delete_collection(preset_name: str):
+            del st.session_state.exhibit_presets[preset_name]
+            exhibit_presets_table.remove(Query().name == preset_name)
+            st.toast(f"Deleted collection '{preset_name}'.", icon="🔥")
 
         selected_preset = st.selectbox("Load from Curated Collection", options=preset_names, index=0)
         
         if selected_preset != "<Select a Collection to Load>":
             c1, c2 = st.columns(2)
-            if c1.button("LOAD COLLECTION", width='stretch', type="primary"):
-                preset_to_load = presets[selected_preset]
-                
-                loaded_settings = copy.deepcopy(preset_to_load['settings'])
-                st.session_state.settings = loaded_settings
-                
-                if settings_table.get(doc_id=1):
-                    settings_table.update(loaded_settings, doc_ids=[1])
-                else:
-                    settings_table.insert(loaded_settings)
-                    
-                st.session_state.history = preset_to_load.get('history', [])
-                st.session_state.evolutionary_metrics = preset_to_load.get('evolutionary_metrics', [])
-                st.session_state.genesis_events = preset_to_load.get('genesis_events', [])
-                
-                pop_data = preset_to_load.get('final_population_genotypes', [])
-                loaded_population = []
-                if pop_data:
-                    try:
-                        for geno_dict in pop_data:
-                            comp_genes_dict = geno_dict.get('component_genes', {})
-                            re_comp_genes = {}
-                            for comp_id, comp_dict in comp_genes_dict.items():
-                                re_comp_genes[comp_id] = ComponentGene(**comp_dict)
-                            geno_dict['component_genes'] = re_comp_genes
-                            
-                            rule_genes_list = geno_dict.get('rule_genes', [])
-                            re_rule_genes = [RuleGene(**rule_dict) for rule_dict in rule_genes_list]
-                            geno_dict['rule_genes'] = re_rule_genes
-                            
-                            loaded_population.append(Genotype(**geno_dict))
-                    except Exception as e:
-                        st.error(f"Error de-serializing population: {e}")
-                        
-                st.session_state.current_population = loaded_population
-                
-                results_to_save = {
-                    'history': st.session_state.history,
-                    'evolutionary_metrics': st.session_state.evolutionary_metrics,
-                }
-                if results_table.get(doc_id=1):
-                    results_table.update(results_to_save, doc_ids=[1])
-                else:
-                    results_table.insert(results_to_save)
-
-                st.toast(f"Loaded collection '{selected_preset}' (with results)!", icon="🌠")
-                st.rerun()
-            if c2.button("DELETE", width='stretch'):
-                del presets[selected_preset] 
-                exhibit_presets_table.remove(Query().name == selected_preset)
-                st.session_state.exhibit_presets = presets
-                st.toast(f"Deleted collection '{selected_preset}'.", icon="🔥")
-                st.rerun()
+            c1.button("LOAD COLLECTION", width='stretch', type="primary", on_click=load_collection, args=(selected_preset,))
+            c2.button("DELETE", width='stretch', on_click=delete_collection, args=(selected_preset,))
                     
         st.sidebar.markdown("---")
         st.sidebar.markdown("#### 📥 Load Exhibit from Archive")
@@ -3368,6 +4577,8 @@ def main():
     if s != st.session_state.settings:
         # This is the crucial change: update the session state with the new values
         st.session_state.settings.update(s)
+        st.session_state.grown_specimens = {}
+        st.session_state.specimen_mri_figures = {}
         if settings_table.get(doc_id=1):
             settings_table.update(st.session_state.settings, doc_ids=[1])
         else:
@@ -3401,7 +4612,7 @@ def main():
         
         if s.get('random_seed', 42) != -1:
             random.seed(s.get('random_seed', 42))
-            np.random.seed(s.get('random_seed', 42))
+            seed_rng(s.get('random_seed', 42))
             st.toast(f"Using fixed random seed: {s.get('random_seed', 42)}", icon="🔢")
             
         population = []
@@ -3441,6 +4652,8 @@ def main():
 
         complexity_thresholds_to_log = [10, 25, 50, 100, 200, 500]
 
+        from scipy.stats import entropy
+
         for gen in range(s.get('num_generations', 200)):
             status_text.markdown(f"### ⏳ Simulating Epoch {gen + 1}/{s.get('num_generations', 200)}")
             
@@ -3493,7 +4706,7 @@ def main():
                 for colony_id, members in colonies.items():
                     if not members: continue
                     
-                    mean_individual_fitness = np.mean([m.individual_fitness for m in members])
+                    mean_individual_fitness = sum(m.individual_fitness for m in members) / len(members)
                     
                     all_components = set()
                     for member in members:
@@ -3510,7 +4723,7 @@ def main():
                         genotype.fitness = (genotype.individual_fitness * (1 - group_weight)) + (group_fitness * group_weight)
 
                 if not st.session_state.get('has_logged_colonial_emergence', False):
-                    pop_mean_fitness = np.mean([g.individual_fitness for g in population])
+                    pop_mean_fitness = sum(g.individual_fitness for g in population) / len(population)
                     if any(gf > pop_mean_fitness * 1.2 for gf in group_fitness_scores.values()):
                         event_desc = "For the first time, individual organisms have aggregated into a cooperative colony whose group success surpasses that of average individuals. This marks a major transition towards higher-level superorganisms."
                         st.session_state.genesis_events.append({
@@ -3806,7 +5019,7 @@ def main():
 
         if s.get('random_seed', 42) != -1:
             random.seed(s.get('random_seed', 42))
-            np.random.seed(s.get('random_seed', 42))
+            seed_rng(s.get('random_seed', 42))
             st.toast(f"Using fixed random seed: {s.get('random_seed', 42)}", icon="🔢")
             
         exhibit_grid = ExhibitGrid(s)
@@ -3824,12 +5037,14 @@ def main():
 
         red_queen = RedQueenParasite()
         if s.get('enable_red_queen', True) and st.session_state.history:
-            last_gen_df = pd.DataFrame(st.session_state.history)
+            last_gen_df = build_records_frame(st.session_state.history)
             last_gen_df = last_gen_df[last_gen_df['generation'] == last_gen_df['generation'].max()]
             if not last_gen_df.empty:
                 kingdom_counts = Counter(last_gen_df['kingdom_id'])
                 if kingdom_counts:
                     red_queen.target_kingdom_id = kingdom_counts.most_common(1)[0][0]
+
+        from scipy.stats import entropy
         
         for gen in range(start_gen, end_gen):
             status_text.markdown(f"### ⏳ Simulating Epoch {gen + 1}/{end_gen}")
@@ -3883,7 +5098,7 @@ def main():
                 for colony_id, members in colonies.items():
                     if not members: continue
                     
-                    mean_individual_fitness = np.mean([m.individual_fitness for m in members])
+                    mean_individual_fitness = sum(m.individual_fitness for m in members) / len(members)
                     
                     all_components = set()
                     for member in members:
@@ -3900,7 +5115,7 @@ def main():
                         genotype.fitness = (genotype.individual_fitness * (1 - group_weight)) + (group_fitness * group_weight)
 
                 if not st.session_state.get('has_logged_colonial_emergence', False):
-                    pop_mean_fitness = np.mean([g.individual_fitness for g in population])
+                    pop_mean_fitness = sum(g.individual_fitness for g in population) / len(population)
                     if any(gf > pop_mean_fitness * 1.2 for gf in group_fitness_scores.values()):
                         event_desc = "For the first time, individual organisms have aggregated into a cooperative colony whose group success surpasses that of average individuals. This marks a major transition towards higher-level superorganisms."
                         st.session_state.genesis_events.append({
@@ -4305,8 +5520,7 @@ def main():
             </div>
         """, unsafe_allow_html=True)
     else:
-        history_df = pd.DataFrame(st.session_state.history)
-        metrics_df = pd.DataFrame(st.session_state.evolutionary_metrics)
+        history_df = build_records_frame(st.session_state.history)
         population = st.session_state.current_population
         
         tab_list = [
@@ -4319,980 +5533,28 @@ def main():
         tab_dashboard, tab_viewer, tab_elites, tab_genesis, tab_analytics_lab = st.tabs(tab_list)
         
         with tab_dashboard:
-            if st.session_state.dashboard_visible:
-                st.header("Exhibit Trajectory Dashboard")
-                st.plotly_chart(
-                    create_simulation_dashboard(history_df, metrics_df), # This function name is fine
-                    width='stretch',
-                    key="main_dashboard_plot_museum"
-                )
-                visualize_fitness_landscape(history_df)
-
-                st.markdown("---")
-                if st.button("Clear & Hide Dashboard", key="hide_dashboard_button"):
-                    st.session_state.dashboard_visible = False
-                    st.rerun()
-            
-            else:
-                st.info("This tab renders the main dashboard with large plots. It is paused to save memory.")
-                if st.button("📈 Render Exhibit Dashboard", key="render_dashboard_button"):
-                    st.session_state.dashboard_visible = True
-                    st.rerun()
+            render_dashboard_tab()
 
         with tab_viewer:
-            st.header("🔬 Specimen Gallery")
-            st.markdown("Observe the phenotypes (body plans) of the organisms that evolved. This is the **shape of life** your exhibit created.")
-            
-            if population:
-                gen_to_view = st.slider("Select Epoch to View", 0, history_df['generation'].max(), history_df['generation'].max())
-                
-                gen_pop_df = history_df[history_df['generation'] == gen_to_view]
-                if gen_pop_df.empty:
-                    st.warning(f"No data for epoch {gen_to_view}. Showing final epoch.")
-                    gen_pop_df = history_df[history_df['generation'] == history_df['generation'].max()]
-                    
-                gen_pop_df = gen_pop_df.sort_values('fitness', ascending=False)
-                
-                num_to_display = s.get('num_ranks_to_display', 3)
-                
-                final_pop_sorted = sorted(population, key=lambda x: x.fitness, reverse=True)
-                top_specimens = final_pop_sorted[:num_to_display]
-                st.info(f"Showing top {num_to_display} specimens from the *final* population (Epoch {population[0].generation}).")
-                
-                cols = st.columns(len(top_specimens))
-                for i, specimen in enumerate(top_specimens):
-                    with cols[i], st.spinner(f"Scanning specimen {i+1}..."):
-                        vis_grid = ExhibitGrid(s)
-                        phenotype = Phenotype(specimen, vis_grid, s)
-
-                        st.markdown(f"**Rank {i+1} (Epoch {specimen.generation})**")
-                        st.metric("Fitness", f"{specimen.fitness:.4f}")
-                        
-                        # --- UPGRADE 1: Use the new MRI Scanner ---
-                        fig_mri = visualize_phenotype_mri(phenotype, vis_grid)
-                        st.plotly_chart(fig_mri, width='stretch', key=f"pheno_mri_{i}")
-
-                        st.markdown("##### **Component Ratios**")
-                        component_counts = Counter(cell.component.name for cell in phenotype.cells.values())
-                        if component_counts:
-                            comp_df = pd.DataFrame.from_dict(component_counts, orient='index', columns=['Count']).reset_index()
-                            comp_df = comp_df.rename(columns={'index': 'Component'})
-                            color_map = {c.name: c.color for c in specimen.component_genes.values()}
-                            fig_pie = px.pie(comp_df, values='Count', names='Component', 
-                                             color='Component', color_discrete_map=color_map, hole=0.4)
-                            fig_pie.update_layout(showlegend=False, margin=dict(l=0, r=0, t=0, b=0), height=150)
-                            st.plotly_chart(fig_pie, width='stretch', key=f"pheno_pie_{i}")
-
-                        # --- UPGRADE 2: Use the new Logic Circuit (Sankey) ---
-                        st.markdown("##### **Genetic Logic Circuit**")
-                        fig_circuit = visualize_grn_sankey(specimen)
-                        st.plotly_chart(fig_circuit, width='stretch', key=f"grn_circuit_{i}")
-
-                        st.markdown("##### **Evolved Objectives**")
-                        if specimen.objective_weights:
-                            obj_df = pd.DataFrame.from_dict(specimen.objective_weights, orient='index', columns=['Weight']).reset_index()
-                            obj_df = obj_df.rename(columns={'index': 'Objective'})
-                            fig_bar = px.bar(obj_df, x='Objective', y='Weight', color='Objective')
-                            fig_bar.update_layout(showlegend=False, margin=dict(l=0, r=0, t=0, b=0), height=200)
-                            st.plotly_chart(fig_bar, width='stretch', key=f"pheno_bar_{i}")
-                        else:
-                            st.info("Global objectives are in use.")
-
-                        st.markdown("##### **Genetic Regulatory Network (GRN)**")
-                        G = nx.DiGraph()
-                        for comp_name, comp_gene in specimen.component_genes.items():
-                            G.add_node(comp_name, type='component', color=comp_gene.color)
-                        for rule in specimen.rule_genes:
-                            action_node = f"{rule.action_type}\n({rule.action_param})"
-                            G.add_node(action_node, type='action', color='#FFB347')
-                            
-                            source_node = list(specimen.component_genes.keys())[0]
-                            if rule.conditions:
-                                type_cond = next((c for c in rule.conditions if c['source'] == 'self_type'), None)
-                                if type_cond and type_cond['target_value'] in G.nodes():
-                                    source_node = type_cond['target_value']
-                                    
-                            G.add_edge(source_node, action_node, label=f"P={rule.probability:.1f}")
-                            if rule.action_param in G.nodes():
-                                G.add_edge(action_node, rule.action_param)
-
-                        if G.nodes:
-                            try:
-                                fig_grn, ax = plt.subplots(figsize=(4, 3))
-                                pos = nx.spring_layout(G, k=0.9, seed=42)
-                                node_colors = [data.get('color', '#888888') for _, data in G.nodes(data=True)]
-                                nx.draw(G, pos, ax=ax, with_labels=False, node_size=500, node_color=node_colors, font_size=6, width=0.5, arrowsize=8)
-                                labels = {n: n.split('\n')[0] for n in G.nodes()}
-                                nx.draw_networkx_labels(G, pos, labels=labels, font_size=7, ax=ax)
-                                st.pyplot(fig_grn)
-                                plt.clf()
-                            except Exception as e:
-                                st.warning(f"Could not draw GRN: {e}")
-                        else:
-                            st.info("No GRN to display.")
-
-                        st.markdown("##### **Genetic Regulatory Network (GRN) 2**")
-                        if G.nodes:
-                            try:
-                                fig_grn_2, ax_2 = plt.subplots(figsize=(4, 3))
-                                pos_2 = nx.kamada_kawai_layout(G)
-                                node_colors = [data.get('color', '#888888') for _, data in G.nodes(data=True)]
-                                nx.draw(G, pos_2, ax=ax_2, with_labels=False, node_size=500, node_color=node_colors, font_size=6, width=0.5, arrowsize=8)
-                                labels = {n: n.split('\n')[0] for n in G.nodes()}
-                                nx.draw_networkx_labels(G, pos_2, labels=labels, font_size=7, ax=ax_2)
-                                st.pyplot(fig_grn_2)
-                                plt.clf()
-                            except Exception as e:
-                                st.warning(f"Could not draw GRN 2: {e}")
-                        else:
-                            st.info("No GRN to display.")
-
-                        st.markdown("##### **Genetic Regulatory Network (GRN) 3**")
-                        if G.nodes:
-                            try:
-                                fig_grn_3, ax_3 = plt.subplots(figsize=(4, 3))
-                                pos_3 = nx.circular_layout(G)
-                                node_colors = [data.get('color', '#888888') for _, data in G.nodes(data=True)]
-                                nx.draw(G, pos_3, ax=ax_3, with_labels=False, node_size=500, node_color=node_colors, font_size=6, width=0.5, arrowsize=8)
-                                labels = {n: n.split('\n')[0] for n in G.nodes()}
-                                nx.draw_networkx_labels(G, pos_3, labels=labels, font_size=7, ax=ax_3)
-                                st.pyplot(fig_grn_3)
-                                plt.clf()
-                            except Exception as e:
-                                st.warning(f"Could not draw GRN 3: {e}")
-                        else:
-                            st.info("No GRN to display.")
-
-                        st.markdown("##### **Genetic Regulatory Network (GRN) 4**")
-                        if G.nodes:
-                            try:
-                                fig_grn_4, ax_4 = plt.subplots(figsize=(4, 3))
-                                pos_4 = nx.random_layout(G, seed=42) 
-                                node_colors = [data.get('color', '#888888') for _, data in G.nodes(data=True)]
-                                nx.draw(G, pos_4, ax=ax_4, with_labels=False, node_size=500, node_color=node_colors, font_size=6, width=0.5, arrowsize=8)
-                                labels = {n: n.split('\n')[0] for n in G.nodes()}
-                                nx.draw_networkx_labels(G, pos_4, labels=labels, font_size=7, ax=ax_4)
-                                st.pyplot(fig_grn_4)
-                                plt.clf()
-                            except Exception as e:
-                                st.warning(f"Could not draw GRN 4: {e}")
-                        else:
-                            st.info("No GRN to display.")
-
-                        st.markdown("##### **Genetic Regulatory Network (GRN) 5**")
-                        if G.nodes:
-                            try:
-                                fig_grn_5, ax_5 = plt.subplots(figsize=(4, 3))
-                                pos_5 = nx.spectral_layout(G) 
-                                node_colors = [data.get('color', '#888888') for _, data in G.nodes(data=True)]
-                                nx.draw(G, pos_5, ax=ax_5, with_labels=False, node_size=500, node_color=node_colors, font_size=6, width=0.5, arrowsize=8)
-                                labels = {n: n.split('\n')[0] for n in G.nodes()}
-                                nx.draw_networkx_labels(G, pos_5, labels=labels, font_size=7, ax=ax_5)
-                                st.pyplot(fig_grn_5)
-                                plt.clf()
-                            except Exception as e:
-                                st.warning(f"Could not draw GRN 5: {e}")
-                        else:
-                            st.info("No GRN to display.")
-
-                        st.markdown("##### **Genetic Regulatory Network (GRN) 6**")
-                        if G.nodes:
-                            try:
-                                fig_grn_6, ax_6 = plt.subplots(figsize=(4, 3))
-                                pos_6 = nx.shell_layout(G) 
-                                node_colors = [data.get('color', '#888888') for _, data in G.nodes(data=True)]
-                                nx.draw(G, pos_6, ax=ax_6, with_labels=False, node_size=500, node_color=node_colors, font_size=6, width=0.5, arrowsize=8)
-                                labels = {n: n.split('\n')[0] for n in G.nodes()}
-                                nx.draw_networkx_labels(G, pos_6, labels=labels, font_size=7, ax=ax_6)
-                                st.pyplot(fig_grn_6)
-                                plt.clf()
-                            except Exception as e:
-                                st.warning(f"Could not draw GRN 6: {e}")
-                        else:
-                            st.info("No GRN to display.")
-
-                        st.markdown("##### **Genetic Regulatory Network (GRN) 7**")
-                        if G.nodes:
-                            try:
-                                fig_grn_7, ax_7 = plt.subplots(figsize=(4, 3))
-                                pos_7 = nx.spiral_layout(G) 
-                                node_colors = [data.get('color', '#888888') for _, data in G.nodes(data=True)]
-                                nx.draw(G, pos_7, ax=ax_7, with_labels=False, node_size=500, node_color=node_colors, font_size=6, width=0.5, arrowsize=8)
-                                labels = {n: n.split('\n')[0] for n in G.nodes()}
-                                nx.draw_networkx_labels(G, pos_7, labels=labels, font_size=7, ax=ax_7)
-                                st.pyplot(fig_grn_7)
-                                plt.clf()
-                            except Exception as e:
-                                st.warning(f"Could not draw GRN 7: {e}")
-                        else:
-                            st.info("No GRN to display.")
-
-                        st.markdown("##### **Genetic Regulatory Network (GRN) 8**")
-                        if G.nodes:
-                            try:
-                                fig_grn_8, ax_8 = plt.subplots(figsize=(4, 3))
-                                try:
-                                    pos_8 = nx.planar_layout(G)
-                                except nx.NetworkXException:
-                                    st.caption("GRN 8: Not planar, falling back to random.")
-                                    pos_8 = nx.random_layout(G, seed=43)
-                                
-                                node_colors = [data.get('color', '#888888') for _, data in G.nodes(data=True)]
-                                nx.draw(G, pos_8, ax=ax_8, with_labels=False, node_size=500, node_color=node_colors, font_size=6, width=0.5, arrowsize=8)
-                                labels = {n: n.split('\n')[0] for n in G.nodes()}
-                                nx.draw_networkx_labels(G, pos_8, labels=labels, font_size=7, ax=ax_8)
-                                st.pyplot(fig_grn_8)
-                                plt.clf()
-                            except Exception as e:
-                                st.warning(f"Could not draw GRN 8: {e}")
-                        else:
-                            st.info("No GRN to display.")
-
-                        st.markdown("##### **Genetic Regulatory Network (GRN) 9**")
-                        if G.nodes:
-                            try:
-                                fig_grn_9, ax_9 = plt.subplots(figsize=(4, 3))
-                                pos_9 = nx.spring_layout(G, k=0.1, seed=42) 
-                                node_colors = [data.get('color', '#888888') for _, data in G.nodes(data=True)]
-                                nx.draw(G, pos_9, ax=ax_9, with_labels=False, node_size=500, node_color=node_colors, font_size=6, width=0.5, arrowsize=8)
-                                labels = {n: n.split('\n')[0] for n in G.nodes()}
-                                nx.draw_networkx_labels(G, pos_9, labels=labels, font_size=7, ax=ax_9)
-                                st.pyplot(fig_grn_9)
-                                plt.clf()
-                            except Exception as e:
-                                st.warning(f"Could not draw GRN 9: {e}")
-                        else:
-                            st.info("No GRN to display.")
-
-                        st.markdown("##### **Genetic Regulatory Network (GRN) 10**")
-                        if G.nodes:
-                            try:
-                                fig_grn_10, ax_10 = plt.subplots(figsize=(4, 3))
-                                pos_10 = nx.spring_layout(G, k=2.0, seed=42) 
-                                node_colors = [data.get('color', '#888888') for _, data in G.nodes(data=True)]
-                                nx.draw(G, pos_10, ax=ax_10, with_labels=False, node_size=500, node_color=node_colors, font_size=6, width=0.5, arrowsize=8)
-                                labels = {n: n.split('\n')[0] for n in G.nodes()}
-                                nx.draw_networkx_labels(G, pos_10, labels=labels, font_size=7, ax=ax_10)
-                                st.pyplot(fig_grn_10)
-                                plt.clf()
-                            except Exception as e:
-                                st.warning(f"Could not draw GRN 10: {e}")
-                        else:
-                            st.info("No GRN to display.")
-
-                        st.markdown("##### **Genetic Regulatory Network (GRN) 11**")
-                        if G.nodes:
-                            try:
-                                fig_grn_11, ax_11 = plt.subplots(figsize=(4, 3))
-                                component_nodes = [n for n, data in G.nodes(data=True) if data.get('type') == 'component']
-                                action_nodes = [n for n, data in G.nodes(data=True) if data.get('type') == 'action']
-                                shell_list = [component_nodes, action_nodes]
-                                
-                                pos_11 = nx.shell_layout(G, nlist=shell_list) 
-                                node_colors = [data.get('color', '#888888') for _, data in G.nodes(data=True)]
-                                nx.draw(G, pos_11, ax=ax_11, with_labels=False, node_size=500, node_color=node_colors, font_size=6, width=0.5, arrowsize=8)
-                                labels = {n: n.split('\n')[0] for n in G.nodes()}
-                                nx.draw_networkx_labels(G, pos_11, labels=labels, font_size=7, ax=ax_11)
-                                st.pyplot(fig_grn_11)
-                                plt.clf()
-                            except Exception as e:
-                                st.warning(f"Could not draw GRN 11: {e}")
-                        else:
-                            st.info("No GRN to display.")
-
-                        st.markdown("##### **Genetic Regulatory Network (GRN) 12**")
-                        if G.nodes:
-                            try:
-                                fig_grn_12, ax_12 = plt.subplots(figsize=(4, 3))
-                                pos_12 = nx.spring_layout(G, iterations=200, seed=42) 
-                                node_colors = [data.get('color', '#888888') for _, data in G.nodes(data=True)]
-                                nx.draw(G, pos_12, ax=ax_12, with_labels=False, node_size=500, node_color=node_colors, font_size=6, width=0.5, arrowsize=8)
-                                labels = {n: n.split('\n')[0] for n in G.nodes()}
-                                nx.draw_networkx_labels(G, pos_12, labels=labels, font_size=7, ax=ax_12)
-                                st.pyplot(fig_grn_12)
-                                plt.clf()
-                            except Exception as e:
-                                st.warning(f"Could not draw GRN 12: {e}")
-                        else:
-                            st.info("No GRN to display.")
-                            
-                        st.markdown("##### **Genetic Regulatory Network (GRN) 13: Hierarchical (Top-Down)**")
-                        if G.nodes:
-                            try:
-                                fig_grn_13, ax_13 = plt.subplots(figsize=(4, 3))
-                                pos_13 = nx.nx_pydot.graphviz_layout(G, prog='dot') 
-                                node_colors = [data.get('color', '#888888') for _, data in G.nodes(data=True)]
-                                nx.draw(G, pos_13, ax=ax_13, with_labels=False, node_size=500, node_color=node_colors, font_size=6, width=0.5, arrowsize=8)
-                                labels = {n: n.split('\n')[0] for n in G.nodes()}
-                                nx.draw_networkx_labels(G, pos_13, labels=labels, font_size=7, ax=ax_13)
-                                st.pyplot(fig_grn_13)
-                                plt.clf()
-                            except ImportError:
-                                st.warning("GRN 13 Error: This layout requires 'pydot' (and Graphviz) to be installed. Falling back to 'spring'.")
-                                try:
-                                    fig_grn_13, ax_13 = plt.subplots(figsize=(4, 3))
-                                    pos_13_fallback = nx.spring_layout(G, seed=13)
-                                    node_colors = [data.get('color', '#888888') for _, data in G.nodes(data=True)]
-                                    nx.draw(G, pos_13_fallback, ax=ax_13, with_labels=False, node_size=500, node_color=node_colors, font_size=6, width=0.5, arrowsize=8)
-                                    labels = {n: n.split('\n')[0] for n in G.nodes()}
-                                    nx.draw_networkx_labels(G, pos_13_fallback, labels=labels, font_size=7, ax=ax_13)
-                                    st.pyplot(fig_grn_13)
-                                    plt.clf()
-                                except Exception as e:
-                                    st.warning(f"Could not draw GRN 13 fallback: {e}")
-                            except Exception as e:
-                                st.warning(f"Could not draw GRN 13: {e}")
-                        else:
-                            st.info("No GRN to display.")
-
-                        st.markdown("##### **Genetic Regulatory Network (GRN) 14: Hierarchical (Radial)**")
-                        if G.nodes:
-                            try:
-                                fig_grn_14, ax_14 = plt.subplots(figsize=(4, 3))
-                                pos_14 = nx.nx_pydot.graphviz_layout(G, prog='twopi') 
-                                node_colors = [data.get('color', '#888888') for _, data in G.nodes(data=True)]
-                                nx.draw(G, pos_14, ax=ax_14, with_labels=False, node_size=500, node_color=node_colors, font_size=6, width=0.5, arrowsize=8)
-                                labels = {n: n.split('\n')[0] for n in G.nodes()}
-                                nx.draw_networkx_labels(G, pos_14, labels=labels, font_size=7, ax=ax_14)
-                                st.pyplot(fig_grn_14)
-                                plt.clf()
-                            except ImportError:
-                                st.warning("GRN 14 Error: This layout requires 'pydot' (and Graphviz) to be installed. Skipping.")
-                            except Exception as e:
-                                st.warning(f"Could not draw GRN 14: {e}")
-                        else:
-                            st.info("No GRN to display.")
-
-                        st.markdown("##### **Genetic Regulatory Network (GRN) 15: Force-Directed (NEATO)**")
-                        if G.nodes:
-                            try:
-                                fig_grn_15, ax_15 = plt.subplots(figsize=(4, 3))
-                                pos_15 = nx.nx_pydot.graphviz_layout(G, prog='neato') 
-                                node_colors = [data.get('color', '#888888') for _, data in G.nodes(data=True)]
-                                nx.draw(G, pos_15, ax=ax_15, with_labels=False, node_size=500, node_color=node_colors, font_size=6, width=0.5, arrowsize=8)
-                                labels = {n: n.split('\n')[0] for n in G.nodes()}
-                                nx.draw_networkx_labels(G, pos_15, labels=labels, font_size=7, ax=ax_15)
-                                st.pyplot(fig_grn_15)
-                                plt.clf()
-                            except ImportError:
-                                st.warning("GRN 15 Error: This layout requires 'pydot' (and Graphviz) to be installed. Skipping.")
-                            except Exception as e:
-                                st.warning(f"Could not draw GRN 15: {e}")
-                        else:
-                            st.info("No GRN to display.")
-
-                        st.markdown("##### **Genetic Regulatory Network (GRN) 16: Spring Layout (Alternate Seed)**")
-                        if G.nodes:
-                            try:
-                                fig_grn_16, ax_16 = plt.subplots(figsize=(4, 3))
-                                pos_16 = nx.spring_layout(G, seed=99) 
-                                node_colors = [data.get('color', '#888888') for _, data in G.nodes(data=True)]
-                                nx.draw(G, pos_16, ax=ax_16, with_labels=False, node_size=500, node_color=node_colors, font_size=6, width=0.5, arrowsize=8)
-                                labels = {n: n.split('\n')[0] for n in G.nodes()}
-                                nx.draw_networkx_labels(G, pos_16, labels=labels, font_size=7, ax=ax_16)
-                                st.pyplot(fig_grn_16)
-                                plt.clf()
-                            except Exception as e:
-                                st.warning(f"Could not draw GRN 16: {e}")
-                        else:
-                            st.info("No GRN to display.")
-
-            else: # This is the case where `if population:` is false
-                st.warning("No population data available to view specimens. Run a simulation.")
+            render_specimen_gallery_tab(history_df, population, s)
 
         with tab_elites:
-            st.header("🧬 Elite Lineage Analysis")
-            st.markdown("A deep dive into the 'DNA' of the most successful organisms. Each rank displays the best organism from a unique Kingdom, showcasing the diversity of life that has evolved.")
-            st.markdown("---")
-
-            if st.session_state.show_elite_analysis:
-                
-                if population:
-                    population.sort(key=lambda x: x.fitness, reverse=True)
-                    num_ranks_to_display = s.get('num_ranks_to_display', 3)
-
-                    elite_specimens = []
-                    seen_kingdoms = set()
-                    for individual in population:
-                        if individual.kingdom_id not in seen_kingdoms:
-                            elite_specimens.append(individual)
-                            seen_kingdoms.add(individual.kingdom_id)
-
-                    for i, individual in enumerate(elite_specimens[:num_ranks_to_display]):
-                        with st.expander(f"**Rank {i+1}:** Kingdom `{individual.kingdom_id}` | Fitness: `{individual.fitness:.4f}`", expanded=(i==0)):
-                            
-                            with st.spinner(f"Growing Rank {i+1}..."):
-                                vis_grid = ExhibitGrid(s)
-                                phenotype = Phenotype(individual, vis_grid, s)
-
-                            col1, col2 = st.columns([1, 1])
-                            with col1:
-                                st.markdown("##### **Core Metrics**")
-                                st.metric("Cell Count", f"{individual.cell_count}")
-                                st.metric("Complexity", f"{individual.compute_complexity():.2f}")
-                                st.metric("Lifespan", f"{individual.lifespan} epochs")
-                                st.metric("Energy Prod.", f"{individual.energy_production:.3f}")
-                                st.metric("Energy Cons.", f"{individual.energy_consumption:.3f}")
-                            
-                            with col2:
-                                st.markdown("##### **Phenotypic MRI Scan**")
-                                # Use the new MRI visualizer here too
-                                fig_mri = visualize_phenotype_mri(phenotype, vis_grid)
-                                st.plotly_chart(fig_mri, width='stretch', key=f"elite_pheno_vis_{i}")
-
-                            st.markdown("---")
-                            
-                            col3, col4 = st.columns([1, 2]) # Give more space to the circuit diagram
-
-                            with col3:
-                                st.markdown("##### **Cellular Composition**")
-                                component_counts = Counter(cell.component.name for cell in phenotype.cells.values())
-                                if component_counts:
-                                    comp_df = pd.DataFrame.from_dict(component_counts, orient='index', columns=['Count']).reset_index()
-                                    comp_df = comp_df.rename(columns={'index': 'Component'})
-                                    color_map = {c.name: c.color for c in individual.component_genes.values()}
-                                    fig_pie = px.pie(comp_df, values='Count', names='Component', 
-                                                     color='Component', color_discrete_map=color_map)
-                                    fig_pie.update_layout(showlegend=True, margin=dict(l=0, r=0, t=0, b=0), height=300)
-                                    st.plotly_chart(fig_pie, width='stretch', key=f"elite_pie_{i}")
-
-                            with col4:
-                                st.markdown("##### **Logic Flow (The 'Mind' of the Organism)**")
-                                # Use the new Sankey visualizer
-                                fig_circuit = visualize_grn_sankey(individual)
-                                st.plotly_chart(fig_circuit, width='stretch', key=f"elite_circuit_{i}")
-                else:
-                    st.warning("No population data available to analyze.")
-                
-                st.markdown("---")
-                if st.button("Clear & Hide Elite Analysis", key="hide_elite"):
-                    st.session_state.show_elite_analysis = False
-                    st.rerun()
-
-            else:
-                st.info("This tab renders detailed organism data. It is paused to save memory.")
-                if st.button("🧬 Render Elite Analysis", key="show_elite"):
-                    st.session_state.show_elite_analysis = True
-                    st.rerun()
+            render_elite_analysis_tab(population, s)
 
         with tab_genesis:
-            st.header("📜 The Chronicle of Genesis")
-            st.markdown("This is the historical record of your exhibit, chronicling the pivotal moments of creation, innovation, and environmental change. These events are the sparks that drive 'truly infinite' evolution.")
-
-            events = st.session_state.get('genesis_events', [])
-            if not events:
-                st.info("No significant evolutionary events have been recorded yet. Run a simulation with innovation and cataclysms enabled.")
-            else:
-                st.markdown("---")
-                event_types = sorted(list(set(e['type'] for e in events)))
-                
-                col1, col2 = st.columns([1, 3])
-                with col1:
-                    st.markdown("#### Filter Events")
-                    gen_range = st.slider(
-                        "Filter by Epoch",
-                        min_value=0,
-                        max_value=history_df['generation'].max(),
-                        value=(0, history_df['generation'].max())
-                    )
-                    selected_types = st.multiselect(
-                        "Filter by Event Type",
-                        options=event_types,
-                        default=event_types
-                    )
-
-                filtered_events = [
-                    e for e in events 
-                    if gen_range[0] <= e['generation'] <= gen_range[1] and e['type'] in selected_types
-                ]
-
-                with col2:
-                    st.markdown(f"#### Recorded History ({len(filtered_events)} events)")
-                    log_container = st.container(height=400)
-                    for event in sorted(filtered_events, key=lambda x: x['generation']):
-                        log_container.markdown(f"""
-                        <div style="border-left: 3px solid #9E7676; padding-left: 10px; margin-bottom: 15px; border-radius: 3px;">
-                            <small>Epoch {event['generation']}</small><br>
-                            <strong>{event['icon']} {event['title']}</strong>
-                            <p style="font-size: 0.9em; color: #ccc;">{event['description']}</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-
-                st.markdown("---")
-                st.markdown("### 💡 Hall of Innovation")
-                st.markdown("A showcase of the most novel organisms that emerged directly after key evolutionary leaps.")
-
-                innovation_events = [e for e in filtered_events if e['type'] in ['Component Innovation', 'Sense Innovation', 'Endosymbiosis', 'Genesis', 'Complexity Leap', 'Major Transition', 'Cognitive Leap']]
-                if not innovation_events:
-                    st.info("No innovation events found in the selected range.")
-                else:
-                    gallery_specimens = []
-                    generations_to_check = sorted(list(set(e['generation'] + 1 for e in innovation_events)))
-                    
-                    lineage_lookup = {p.lineage_id: p for p in population}
-
-                    for event in innovation_events:
-                        next_gen = event['generation'] + 1
-                        next_gen_df = history_df[history_df['generation'] == next_gen]
-                        if not next_gen_df.empty:
-                            best_in_gen_idx = next_gen_df['fitness'].idxmax()
-                            best_organism_info = next_gen_df.loc[best_in_gen_idx]
-                            best_lineage_id = best_organism_info['lineage_id']
-                            
-                            specimen = lineage_lookup.get(best_lineage_id)
-                            
-                            if specimen and not any(s['specimen'].id == specimen.id for s in gallery_specimens):
-                                gallery_specimens.append({
-                                    'specimen': specimen,
-                                    'innovation_title': event['title'],
-                                    'innovation_gen': next_gen 
-                                })
-                    
-                    if not gallery_specimens:
-                        st.warning("Could not find representative specimens for the selected innovations.")
-                    else:
-                        for i, item in enumerate(gallery_specimens[:3]):
-                            specimen = item['specimen']
-                            st.markdown(f"#### 🏅 Specimen from Epoch {item['innovation_gen']} (Post-'*{item['innovation_title']}*')")
-                            
-                            with st.spinner(f"Growing and analyzing specimen {i+1}..."):
-                                    vis_grid = ExhibitGrid(s)
-                                    phenotype = Phenotype(specimen, vis_grid, s)
-
-                            col1, col2, col3 = st.columns(3)
-
-                            with col1:
-                                st.markdown("**Phenotype (Body Plan)**")
-                                fig_pheno = visualize_phenotype_2d(phenotype, vis_grid)
-                                fig_pheno.update_layout(height=250, title=None, margin=dict(l=0, r=0, t=0, b=0))
-                                st.plotly_chart(fig_pheno, width='stretch', key=f"gallery_pheno_{i}")
-                                
-                                st.markdown("**Component Composition**")
-                                component_counts = Counter(cell.component.name for cell in phenotype.cells.values())
-                                if component_counts:
-                                    comp_df = pd.DataFrame.from_dict(component_counts, orient='index', columns=['Count']).reset_index()
-                                    comp_df = comp_df.rename(columns={'index': 'Component'})
-                                    color_map = {c.name: c.color for c in specimen.component_genes.values()}
-                                    fig_pie = px.pie(comp_df, values='Count', names='Component', 
-                                                     color='Component', color_discrete_map=color_map)
-                                    fig_pie.update_layout(showlegend=False, margin=dict(l=0, r=0, t=0, b=0), height=200)
-                                    st.plotly_chart(fig_pie, width='stretch', key=f"gallery_pyie_{i}")
-                            with col2:
-                                st.markdown("**Internal Energy Distribution**")
-                                energy_data = np.full((vis_grid.width, vis_grid.height), np.nan)
-                                for (x, y), cell in phenotype.cells.items():
-                                    energy_data[x, y] = cell.energy
-                                fig_energy = px.imshow(energy_data, color_continuous_scale='viridis', aspect='equal')
-                                fig_energy.update_layout(height=250, title=None, margin=dict(l=0, r=0, t=0, b=0), coloraxis_showscale=False)
-                                fig_energy.update_xaxes(showticklabels=False).update_yaxes(showticklabels=False)
-                                st.plotly_chart(fig_energy, width='stretch', key=f"gallery_energye_{i}")
-
-                            with col3:
-                                st.markdown("**Cellular Age Map**")
-                                age_data = np.full((vis_grid.width, vis_grid.height), np.nan)
-                                for (x, y), cell in phenotype.cells.items():
-                                    age_data[x, y] = cell.age
-                                fig_age = px.imshow(age_data, color_continuous_scale='plasma', aspect='equal')
-                                fig_age.update_layout(height=250, title=None, margin=dict(l=0, r=0, t=0, b=0), coloraxis_showscale=False)
-                                fig_age.update_xaxes(showticklabels=False).update_yaxes(showticklabels=False)
-                                st.plotly_chart(fig_age, width='stretch', key=f"galleriey_age_{i}")
-                            st.markdown("---")
-                
-                # --- NEW: Epochs & Phylogeny Section ---
-                st.markdown("---") # Separator
-                st.markdown("### ⏳ Epochs & Phylogeny")
-                st.markdown("A macro-level analysis of your exhibit's history, identifying distinct eras and visualizing the evolutionary tree of its kingdoms.")
-
-                col1, col2 = st.columns([2, 1])
-
-                with col1:
-                    st.markdown("#### The Great Epochs of History")
-                    # Identify break points for epochs
-                    break_points = {0, history_df['generation'].max()}
-                    major_events = [e for e in events if e['type'] in ['Cataclysm', 'Genesis', 'Succession']]
-                    for event in major_events:
-                        break_points.add(event['generation'])
-                    
-                    sorted_breaks = sorted(list(break_points))
-                    
-                    if len(sorted_breaks) < 2:
-                        st.info("Not enough major events have occurred to define distinct historical epochs.")
-                    else:
-                        for i in range(len(sorted_breaks) - 1):
-                            start_gen = sorted_breaks[i]
-                            end_gen = sorted_breaks[i+1]
-                            
-                            epoch_df = history_df[(history_df['generation'] >= start_gen) & (history_df['generation'] <= end_gen)]
-                            if epoch_df.empty: continue
-
-                            # Determine epoch name from the event that started it
-                            start_event = next((e for e in major_events if e['generation'] == start_gen), None)
-                            epoch_name = f"Epoch {i+1}"
-                            if i == 0 and not start_event: epoch_name = "The Primordial Era"
-                            elif start_event: epoch_name = f"The {start_event['title']} Era"
-
-                            with st.expander(f"**{epoch_name}** (Epochs {start_gen} - {end_gen})"):
-                                # --- NEW: More complex and shocking details ---
-                                c1, c2, c3 = st.columns(3)
-                                
-                                # 1. Core Metrics
-                                with c1:
-                                    st.markdown("##### Core Metrics")
-                                    dominant_kingdom = epoch_df['kingdom_id'].mode()[0] if not epoch_df['kingdom_id'].mode().empty else "N/A"
-                                    mean_fitness = epoch_df['fitness'].mean()
-                                    peak_complexity = epoch_df['complexity'].max()
-                                    st.metric("Dominant Kingdom", dominant_kingdom)
-                                    st.metric("Mean Fitness", f"{mean_fitness:.3f}")
-                                    st.metric("Peak Complexity", f"{peak_complexity:.2f}")
-
-                                # 2. Evolutionary Dynamics
-                                with c2:
-                                    st.markdown("##### Dynamics")
-                                    start_fitness = history_df[history_df['generation'] == start_gen]['fitness'].mean()
-                                    end_fitness = history_df[history_df['generation'] == end_gen]['fitness'].mean()
-                                    velocity = (end_fitness - start_fitness) / max(1, end_gen - start_gen)
-                                    st.metric("Evolutionary Velocity", f"{velocity*100:.2f} ΔF/100epochs")
-
-                                    apex_organism_idx = epoch_df['fitness'].idxmax()
-                                    apex_organism = epoch_df.loc[apex_organism_idx]
-                                    st.markdown(f"**Apex Predator:** A `{apex_organism['kingdom_id']}` organism reached a peak fitness of **{apex_organism['fitness']:.3f}** with complexity **{apex_organism['complexity']:.1f}**.")
-
-                                # 3. Innovations and Extinctions
-                                with c3:
-                                    st.markdown("##### Historical Events")
-                                    epoch_events = [e for e in events if start_gen <= e['generation'] < end_gen]
-                                    innovations = [e['title'] for e in epoch_events if 'Innovation' in e['type']]
-                                    if innovations:
-                                        st.markdown("**Key Innovations:**")
-                                        for innov in innovations[:3]:
-                                            st.markdown(f"- `{innov.replace('New Component: ', '').replace('New Sense: ', '')}`")
-                                    
-                                    kingdoms_at_start = set(history_df[history_df['generation'] == start_gen]['kingdom_id'].unique())
-                                    kingdoms_at_end = set(history_df[history_df['generation'] == end_gen]['kingdom_id'].unique())
-                                    extinct_kingdoms = kingdoms_at_start - kingdoms_at_end
-                                    if extinct_kingdoms:
-                                        st.markdown("**Extinctions:**")
-                                        for kingdom in extinct_kingdoms:
-                                            st.markdown(f"- The **{kingdom}** kingdom perished.")
-
-                with col2:
-                    st.markdown("#### The Tree of Life (Phylogeny)")
-                    phylogeny_graph = nx.DiGraph()
-                    # Find the first occurrence of each kingdom
-                    first_occurrence = history_df.loc[history_df.groupby('kingdom_id')['generation'].idxmin()]
-                    
-                    for _, row in first_occurrence.iterrows():
-                        kingdom = row['kingdom_id']
-                        gen = row['generation']
-                        phylogeny_graph.add_node(kingdom, label=f"{kingdom}\n(Epoch {gen})")
-
-                        # Find parent lineage
-                        parent_ids_list = history_df.loc[history_df['lineage_id'] == row['lineage_id'], 'parent_ids'].iloc[0]
-                        
-                        if isinstance(parent_ids_list, list) and len(parent_ids_list) > 0:
-                            first_parent_id = parent_ids_list[0]
-                            parent_df = history_df[history_df['lineage_id'] == first_parent_id]
-                            
-                            if not parent_df.empty:
-                                parent_kingdom = parent_df.iloc[0]['kingdom_id']
-                                if parent_kingdom != kingdom and parent_kingdom in phylogeny_graph.nodes():
-                                    phylogeny_graph.add_edge(parent_kingdom, kingdom)
-
-                    if not phylogeny_graph.nodes():
-                        st.info("No kingdom data to build a tree of life.")
-                    else:
-                        fig_tree, ax_tree = plt.subplots(figsize=(5, 4))
-                        pos = nx.spring_layout(phylogeny_graph, seed=42, k=0.9)
-                        labels = nx.get_node_attributes(phylogeny_graph, 'label')
-                        nx.draw(phylogeny_graph, pos, labels=labels, with_labels=True, node_size=3000, node_color='#9E7676', font_size=8, font_color='white', arrowsize=20, ax=ax_tree)
-                        ax_tree.set_title("Phylogeny of Kingdoms")
-                        st.pyplot(fig_tree)
-                        plt.clf()
-                
-                # --- NEW: Dynastic Histories Section ---
-                st.markdown("---")
-                st.markdown("### 👑 Dynastic Histories")
-                st.markdown("Trace the complete story of the most influential lineages in your exhibit. Select a dynasty to view its rise, its peak, and its eventual fate.")
-
-                # Identify major lineages from apex predators of each epoch
-                major_lineages = {}
-                if len(sorted_breaks) > 1:
-                    for i in range(len(sorted_breaks) - 1):
-                        start_gen, end_gen = sorted_breaks[i], sorted_breaks[i+1]
-                        epoch_df = history_df[(history_df['generation'] >= start_gen) & (history_df['generation'] <= end_gen)]
-                        if not epoch_df.empty:
-                            apex_organism_idx = epoch_df['fitness'].idxmax()
-                            apex_organism = epoch_df.loc[apex_organism_idx]
-                            lineage_id = apex_organism['lineage_id']
-                            if lineage_id not in major_lineages:
-                                major_lineages[lineage_id] = f"Apex of Epoch {i+1} (Epoch {apex_organism['generation']})"
-
-                if not major_lineages:
-                    st.info("No major dynasties have been identified yet. Run a longer simulation to establish dominant lineages.")
-                else:
-                    lineage_options = list(major_lineages.keys())
-                    selected_lineage_id = st.selectbox(
-                        "Select a Dynasty to Investigate",
-                        options=lineage_options,
-                        format_func=lambda x: f"Lineage {x} ({major_lineages[x]})"
-                    )
-
-                    if selected_lineage_id:
-                        lineage_df = history_df[history_df['lineage_id'] == selected_lineage_id].sort_values('generation')
-                        universe_avg_df = history_df.groupby('generation')[['fitness', 'complexity']].mean().reset_index()
-
-                        # --- 1. Summary Stats ---
-                        founder = lineage_df.iloc[0]
-                        peak = lineage_df.loc[lineage_df['fitness'].idxmax()]
-                        survived_gens = lineage_df['generation'].nunique()
-
-                        c1, c2, c3, c4 = st.columns(4)
-                        c1.metric("Founded in Epoch", f"{founder['generation']}")
-                        c2.metric("Founder's Kingdom", founder['kingdom_id'])
-                        c3.metric("Peak Fitness", f"{peak['fitness']:.3f}")
-                        c4.metric("Epochs of Dominance", f"{survived_gens}")
-
-                        # --- 2. Performance Chart ---
-                        fig_lineage = go.Figure()
-                        fig_lineage.add_trace(go.Scatter(x=lineage_df['generation'], y=lineage_df['fitness'], mode='lines', name=f'Lineage {selected_lineage_id} Fitness', line=dict(color='cyan', width=3)))
-                        fig_lineage.add_trace(go.Scatter(x=universe_avg_df['generation'], y=universe_avg_df['fitness'], mode='lines', name='Exhibit Avg. Fitness', line=dict(color='gray', dash='dot')))
-                        fig_lineage.update_layout(title=f"Fitness Trajectory of Dynasty {selected_lineage_id}", height=300, margin=dict(l=0, r=0, t=40, b=0))
-                        st.plotly_chart(fig_lineage, width='stretch', key=f"dynasty_perf_{selected_lineage_id}")
-
-                        # --- NEW: More Complex Details ---
-                        sub_col1, sub_col2 = st.columns(2)
-
-                        with sub_col1:
-                            # --- Dynastic Event Log ---
-                            st.markdown("##### Dynastic Event Log")
-                            dynasty_events = [e for e in events if founder['generation'] <= e['generation'] <= lineage_df.iloc[-1]['generation']]
-                            if not dynasty_events:
-                                st.info("This dynasty's lifespan was uneventful.")
-                            else:
-                                event_log_container = st.container(height=200)
-                                for event in sorted(dynasty_events, key=lambda x: x['generation']):
-                                    event_log_container.markdown(f"**Epoch {event['generation']}:** {event['icon']} {event['title']}")
-
-                            # --- Legacy of Innovation ---
-                            st.markdown("##### Legacy of Innovation")
-                            innovations = [e for e in dynasty_events if 'Innovation' in e['type'] and e.get('lineage_id') == selected_lineage_id]
-                            if not innovations:
-                                st.info("This dynasty was a follower, not an innovator.")
-                            else:
-                                for innov in innovations:
-                                    st.markdown(f"💡 Invented **{innov['title'].split(': ')[1]}** in Epoch {innov['generation']}.")
-
-                        with sub_col2:
-                            # --- Evolved Strategy Profile ---
-                            st.markdown("##### Apex Strategy Profile (GRN Analysis)")
-                            apex_specimen = max((g for g in st.session_state.get('gene_archive', []) if g.lineage_id == peak['lineage_id']), key=lambda g: g.fitness, default=None)
-                            if apex_specimen:
-                                rule_actions = Counter(r.action_type for r in apex_specimen.rule_genes)
-                                action_df = pd.DataFrame.from_dict(rule_actions, orient='index', columns=['Count']).reset_index()
-                                fig_strategy = px.bar(action_df, x='index', y='Count', title="GRN Action Type Frequency", labels={'index': 'Action Type'})
-                                fig_strategy.update_layout(height=300, margin=dict(l=0, r=0, t=40, b=0))
-                                st.plotly_chart(fig_strategy, width='stretch', key=f"dynasty_strat_{selected_lineage_id}")
-
-                        # --- 3. Gallery of Ancestors ---
-                        st.markdown("##### Gallery of Ancestors")
-                        
-                        last_known_member = lineage_df.iloc[-1]
-                        ancestors_to_find = {
-                            'Founder': (founder['generation'], founder['lineage_id']),
-                            'Apex': (peak['generation'], peak['lineage_id']),
-                            'Last Known': (last_known_member['generation'], last_known_member['lineage_id'])
-                        }
-                        
-                        ancestor_specimens = {}
-                        gene_archive = st.session_state.get('gene_archive', [])
-                        for role, (gen, l_id) in ancestors_to_find.items():
-                            candidate = max(
-                                (g for g in gene_archive if g.generation == gen and g.lineage_id == l_id),
-                                key=lambda g: g.fitness, default=None)
-                            if candidate:
-                                ancestor_specimens[role] = candidate
-
-                        if not ancestor_specimens:
-                            st.warning("Could not retrieve ancestor data from the gene archive for this dynasty.")
-                        else:
-                            cols = st.columns(len(ancestor_specimens))
-                            for i, (role, specimen) in enumerate(ancestor_specimens.items()):
-                                with cols[i]:
-                                    st.markdown(f"**The {role}** (Epoch {specimen.generation})")
-                                    st.metric("Fitness", f"{specimen.fitness:.4f}")
-                                    with st.spinner(f"Growing {role}..."):
-                                        vis_grid = ExhibitGrid(s)
-                                        phenotype = Phenotype(specimen, vis_grid, s)
-                                        fig = visualize_phenotype_2d(phenotype, vis_grid)
-                                        fig.update_layout(height=250, title=None, margin=dict(l=0, r=0, t=0, b=0))
-                                        st.plotly_chart(fig, width='stretch', key=f"dynasty_vis_{selected_lineage_id}_{i}")
-                
-                # --- NEW: Pantheon of Genes Section ---
-                st.markdown("---")
-                st.markdown("### 🔬 The Pantheon of Life")
-                st.markdown("A hall of fame for the most impactful genetic 'ideas' of your exhibit. This analyzes the entire fossil record to identify the components and rule strategies that defined success.")
-
-                gene_archive = st.session_state.get('gene_archive', [])
-                if not gene_archive:
-                    st.info("The gene archive is empty. Run a simulation to populate the fossil record.")
-                else:
-                    pantheon_col1, pantheon_col2 = st.columns(2)
-
-                    with pantheon_col1:
-                        st.markdown("#### The Pantheon of Components")
-                        
-                        # --- Analysis ---
-                        all_components = {}
-                        for genotype in gene_archive:
-                            for comp_name, comp_gene in genotype.component_genes.items():
-                                if comp_name not in all_components:
-                                    all_components[comp_name] = {
-                                        'gene': comp_gene,
-                                        'first_gen': genotype.generation,
-                                        'inventor_lineage': genotype.lineage_id,
-                                        'fitness_sum': 0,
-                                        'usage_count': 0,
-                                        'prevalence_history': Counter()
-                                    }
-                                all_components[comp_name]['fitness_sum'] += genotype.fitness
-                                all_components[comp_name]['usage_count'] += 1
-                                all_components[comp_name]['prevalence_history'][genotype.generation] += 1
-
-                        # Calculate scores
-                        scored_components = []
-                        for name, data in all_components.items():
-                            avg_fitness = data['fitness_sum'] / data['usage_count'] if data['usage_count'] > 0 else 0
-                            longevity = history_df['generation'].max() - data['first_gen']
-                            final_prevalence = sum(1 for g in population if name in g.component_genes) if population else 0
-                            
-                            score = (avg_fitness * 100) + (longevity * 0.1) + (final_prevalence * 1)
-                            data['score'] = score
-                            scored_components.append(data)
-
-                        # Display top components
-                        for i, comp_data in enumerate(sorted(scored_components, key=lambda x: x['score'], reverse=True)[:5]):
-                            comp_gene = comp_data['gene']
-                            with st.expander(f"**{i+1}. {comp_gene.name}** (Score: {comp_data['score']:.0f})", expanded=(i<2)):
-                                st.markdown(f"Invented in **Epoch {comp_data['first_gen']}** by Dynasty `{comp_data['inventor_lineage']}`")
-                                st.code(f"[{comp_gene.color}] Base: {comp_gene.base_kingdom}, Mass: {comp_gene.mass:.2f}, Struct: {comp_gene.structural:.2f}, E.Store: {comp_gene.energy_storage:.2f}", language="text")
-                                
-                                # Prevalence Plot
-                                history = comp_data['prevalence_history']
-                                prevalence_df = pd.DataFrame(list(history.items()), columns=['generation', 'count']).sort_values('generation')
-                                fig_prevalence = px.area(prevalence_df, x='generation', y='count', title="Prevalence Over Time")
-                                fig_prevalence.update_layout(height=200, margin=dict(l=0, r=0, t=30, b=0))
-                                st.plotly_chart(fig_prevalence, width='stretch', key=f"pantheon_prevalence_{comp_gene.id}")
-
-                    with pantheon_col2:
-                        st.markdown("#### The Lawgivers: Elite Genetic Strategies")
-                        
-                        # Find elite specimens
-                        elites = []
-                        if population:
-                            sorted_pop = sorted(population, key=lambda x: x.fitness, reverse=True)
-                            seen_kingdoms = set()
-                            for org in sorted_pop:
-                                if org.kingdom_id not in seen_kingdoms:
-                                    elites.append(org)
-                                    seen_kingdoms.add(org.kingdom_id)
-                        
-                        if not elites:
-                            st.info("No elite organisms found to analyze.")
-                        else:
-                            # Analyze rule actions and conditions
-                            elite_actions = Counter()
-                            elite_conditions = Counter()
-                            for elite in elites:
-                                elite_actions.update(r.action_type for r in elite.rule_genes)
-                                for r in elite.rule_genes:
-                                    elite_conditions.update(c['source'] for c in r.conditions)
-
-                            action_df = pd.DataFrame(elite_actions.items(), columns=['Action', 'Count']).sort_values('Count', ascending=False)
-                            cond_df = pd.DataFrame(elite_conditions.items(), columns=['Condition', 'Count']).sort_values('Count', ascending=False)
-
-                            fig_actions = px.bar(action_df, x='Action', y='Count', title="Elite Strategic Blueprint (GRN Actions)")
-                            fig_actions.update_layout(height=250, margin=dict(l=0, r=0, t=40, b=0))
-                            st.plotly_chart(fig_actions, width='stretch', key="pantheon_elite_actions")
-
-                            fig_conds = px.bar(cond_df, x='Condition', y='Count', title="Elite Sensory Profile (GRN Conditions)")
-                            fig_conds.update_layout(height=250, margin=dict(l=0, r=0, t=40, b=0))
-                            st.plotly_chart(fig_conds, width='stretch', key="pantheon_elite_conditions")
-
+            render_genesis_chronicle_tab(history_df, population, s)
 
         with tab_analytics_lab:
-            if st.session_state.analytics_lab_visible:
-                st.header("📊 Custom Analytics Lab")
-                st.markdown("A flexible laboratory for generating custom 2D plots to explore relationships within your exhibit's history. Configure the number of plots in the Curator's Console.")
-                st.markdown("---")
-
-                num_plots = s.get('num_custom_plots', 4)
-                
-                plot_functions = [
-                    plot_fitness_vs_complexity,
-                    plot_lifespan_vs_cell_count,
-                    plot_energy_dynamics,
-                    plot_complexity_density,
-                    plot_fitness_violin_by_kingdom,
-                    plot_complexity_vs_lifespan,
-                    plot_energy_efficiency_over_time,
-                    plot_cell_count_dist_by_kingdom,
-                    plot_lifespan_dist_by_kingdom,
-                    plot_complexity_vs_energy_prod,
-                    plot_fitness_scatter_over_time,
-                    plot_elite_parallel_coords
-                ]
-
-                cols = st.columns(2)
-                for i in range(num_plots):
-                    with cols[i % 2]:
-                        if i < len(plot_functions):
-                            plot_func = plot_functions[i]
-                            fig = plot_func(history_df, key=f"custom_plot_{i}")
-                            st.plotly_chart(fig, width='stretch', key=f"custom_plotly_chart_{i}")
-                
-                st.markdown("---")
-                if st.button("Clear & Hide Analytics Lab", key="hide_analytics_lab_button"):
-                    st.session_state.analytics_lab_visible = False
-                    st.rerun()
-
-            else:
-                st.info("This tab renders custom plots. It is paused to save memory.")
-                if st.button("📊 Render Custom Analytics Lab", key="render_analytics_lab_button"):
-                    st.session_state.analytics_lab_visible = True
-                    st.rerun()
-        
-        
+            render_analytics_lab_tab(s)
         
         st.markdown("---")
         
         try:
-            final_grid_state = {}
-            if 'exhibit_grid' in st.session_state and st.session_state.exhibit_grid is not None:
-                final_grid_state = {name: arr.tolist() for name, arr in st.session_state.exhibit_grid.resource_map.items()}
-
-            download_data = {
-                "settings": st.session_state.settings,
-                "history": st.session_state.history,
-                "evolutionary_metrics": st.session_state.evolutionary_metrics,
-                "genesis_events": st.session_state.get('genesis_events', []),
-                "final_population_genotypes": [asdict(g) for g in population] if population else [],
-                "full_gene_archive": [asdict(g) for g in st.session_state.get('gene_archive', [])],
-                "final_physics_constants": CHEMICAL_BASES_REGISTRY,
-                "final_evolved_senses": st.session_state.get('evolvable_condition_sources', []),
-                "final_grid_state": final_grid_state
-            }
-            
-            zip_buffer = io.BytesIO()
-
-            with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED, allowZip64=True) as zf:
-                json_string = json.dumps(download_data, indent=4, cls=GenotypeJSONEncoder)
-                
-                file_name_in_zip = f"exhibit_archive_{s.get('experiment_name', 'run').replace(' ', '_')}.json"
-                zf.writestr(file_name_in_zip, json_string.encode('utf-8'))
+            archive_zip = build_exhibit_archive_zip(s, population)
 
             st.download_button(
                 label="📥 Download Exhibit Archive (.zip)",
-                data=zip_buffer.getvalue(),
+                data=archive_zip,
                 file_name=f"exhibit_archive_{s.get('experiment_name', 'run').replace(' ', '_')}.zip",
                 mime="application/zip", # Correct MIME type for zip
                 help="Download the complete exhibit state (settings, history, gene archive) as a compressed ZIP file."
@@ -5306,7 +5568,6 @@ def main():
 if __name__ == "__main__":
     import matplotlib
     matplotlib.use('Agg')
-    import matplotlib.pyplot as plt
 
     original_toast = st.toast
     def chronicle_toast(body, icon=None):